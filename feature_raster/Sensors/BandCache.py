@@ -0,0 +1,85 @@
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+
+class BandCache:
+    """Keeps the decoded band stacks of the images as .npy files in directory, the next
+    sensors of the same image map the file instead of decoding the image again, and
+    the pages of the file are shared by every process that maps it.
+
+    The files are keyed by the path, size and modification time of the image and the
+    bands read, so a modified image is decoded again. When the files take more than
+    max_bytes the least recently used ones are removed"""
+
+    def __init__(self, directory, max_bytes=10 * 2 ** 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, files, *selection):
+        """key of the stack read from files, the file of the image or the files of its bands,
+        with selection, e.g. the band indexes"""
+        files = [files] if isinstance(files, str) else files
+        stats = [(os.path.abspath(file_path), os.stat(file_path)) for file_path in files]
+        identity = tuple((file_path, stat.st_size, stat.st_mtime_ns) for file_path, stat in stats) + selection
+        return hashlib.sha1(repr(identity).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npy")
+
+    def get(self, key):
+        """The cached stack of key mapped copy on write, the changes are not saved, or None"""
+        file_path = self._path(key)
+        try:
+            stack = np.load(file_path, mmap_mode="c")
+        except FileNotFoundError:
+            return None
+        # the modification time of the files is the time of their last use
+        os.utime(file_path)
+        return stack
+
+    def put(self, key, stack):
+        """Saves stack and returns it mapped from the cache, stacks bigger than max_bytes
+        are not cached and returned as they are"""
+        if stack.nbytes > self.max_bytes:
+            return stack
+        self.evict(self.max_bytes - stack.nbytes)
+        # written under another name and renamed so other processes never map half a file
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as f:
+                np.save(f, stack)
+            os.replace(temporary, self._path(key))
+        except BaseException:
+            os.remove(temporary)
+            raise
+        return self.get(key)
+
+    def load(self, key, read):
+        """The cached stack of key, calling read to get it and caching it if there is none"""
+        stack = self.get(key)
+        if stack is None:
+            stack = self.put(key, read())
+        return stack
+
+    def evict(self, max_bytes=None):
+        """Removes the least recently used files until the cache takes at most max_bytes,
+        the max_bytes of the cache if None"""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        files = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".npy")]
+        files.sort(key=lambda entry: entry.stat().st_mtime_ns)
+        size = sum(entry.stat().st_size for entry in files)
+        for entry in files:
+            if size <= max_bytes:
+                break
+            size -= entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:  # removed by another process
+                pass
+
+    def clear(self):
+        self.evict(0)
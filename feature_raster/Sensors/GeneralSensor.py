@@ -1,36 +1,165 @@
+import contextlib
+import itertools
+import json
+import math
+import tempfile
 import rasterio
+import rasterio.shutil
 
 import numpy as np
 import pandas as pd
 import geopandas as gpd
+from shapely.geometry import MultiPolygon, box
 
+from concurrent.futures import ThreadPoolExecutor
 from os import path
-from rasterio import features
+from rasterio import features, windows
+from rasterio.crs import CRS
+from rasterio.enums import Resampling
+from rasterio.transform import Affine
+from rasterio.vrt import WarpedVRT
+from rasterio.warp import calculate_default_transform, transform_bounds
+from rasterio.windows import Window
 
-from feature_raster.exceptions import InvalidTypeOfGeom, NoCobertureSeries
+from feature_raster.Sensors.BandCache import BandCache
+from feature_raster.Sensors.vrt import find_product_files, stack_vrt
+from feature_raster.exceptions import InvalidBand, InvalidTypeOfGeom, NoCobertureSeries
 from feature_raster.project_enums import GeneralSensorEnums
 
+try:
+    import pyarrow
+    import pyarrow.feather
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pyarrow is optional, it is only needed to save and load parquet and feather files
+    pyarrow = None
+
 
 class GeneralSensor:
+    # names of the columns of the dataframe, one per band of the image, BAND_n if None
+    band_names = None
+    # suffixes of the names of the files of each band in the products with one file per
+    # band, see vrt.find_product_files
+    product_bands = None
+
+    def __init__(self, img_path: str, lazy: bool = False, n_threads: int = 1, bands=None,
+                 valid_only: bool = False, decimation: int = 1, resampling: str = "nearest", cache=None,
+                 warp=None):
+        """Reads the metadata of the image and, unless lazy, its pixels into the dataframe
+        property, one column per band and one row per pixel.
+
+        Parameters
+        ----------
+        img_path: the file of the image, a {band name: file} dict of a file per band or the
+            directory of a product with a file per band (see product_bands), the files of
+            the bands are read as a virtual stack without writing a new file
+        lazy: only read the metadata, the pixels are read the first time the dataframe
+            property is used or when load is called
+        n_threads: threads that read the bands, see _read_in_threads
+        bands: names of the only bands to read, e.g. ["RED", "NIR"] (see band_names and
+            the required_bands of the transformers), all of them if None
+        valid_only: keep only the pixels valid in every band according to the masks of
+            the image (its nodata), the index of the dataframe is the position of each
+            pixel in the image (see rows_cols) and the rasters written from it have nodata
+            in the rest of the pixels
+        decimation: read the image decimation times smaller on each side, from its
+            overviews or resampled with resampling, meta, res and everything read or
+            written are the ones of the smaller image, for previews
+        resampling: name of a rasterio.enums.Resampling for decimation and warp
+        cache: a BandCache, or its directory, that keeps the decoded bands for the next
+            sensors of the same image and bands
+        warp: {"crs", "resolution"} or {"crs", "transform", "width", "height"} of another
+            grid, the crs of the image if it is not given. The image is read reprojected
+            to that grid through a warped virtual view and meta and everything read or
+            written are the ones of the grid
+        """
 
-    def __init__(self, img_path: str):
-
-        if path.exists(img_path):
-            self.img_path = img_path
-            self.bounds = dict()
-            self.crs = None
-            self.dtypes = None
-            self.indexes = None
-            self.meta = {}  # count, driver, dtype,
-            self.res = None
-            self.__dataframe = None
-            self.__read_metadata_file()
-            self._to_pandas()
+        self._source, self._files, self._stack_names = self._resolve_source(img_path)
+        # a dict of files is kept with the names of the bands as keys, not LandsatEnums
+        self.img_path = dict(zip(self._stack_names, self._files)) if isinstance(img_path, dict) else img_path
+        self.n_threads = n_threads
+        self.valid_only = valid_only
+        if not isinstance(decimation, int) or decimation < 1:
+            raise ValueError(f"decimation must be an int greater than 0, not {decimation}")
+        self.decimation = decimation
+        self.resampling = Resampling[resampling]
+        self.cache = BandCache(cache) if isinstance(cache, str) else cache
+        self._warp = None if warp is None else self._warp_grid(warp)
+        self.bounds = dict()
+        self.crs = None
+        self.dtypes = None
+        self.indexes = None
+        self.meta = {}  # count, driver, dtype,
+        self.res = None
+        self.bands = None
+        self.band_indexes = None
+        self.cobertures = None
+        self.__dataframe = None
+        with self._open() as dataset:
+            self.__read_metadata_file(dataset)
+            self.__select_bands(dataset, bands)
+            if not lazy:
+                self._to_pandas(dataset)
+
+    def _resolve_source(self, img_path):
+        """What rasterio opens for img_path, the files it reads and, for a file per band,
+        the names of the bands of the stack in order (the ones of band_names with a file)"""
+        if isinstance(img_path, dict):
+            files = {getattr(band, "value", band): file_path for band, file_path in img_path.items()}
+        elif path.isdir(img_path):
+            if self.product_bands is None:
+                raise ValueError(f"{type(self).__name__} does not know the names of the files of the bands")
+            files = find_product_files(img_path, self.product_bands)
+            if not files:
+                raise ValueError(f"There are no files of bands in {img_path}")
+        elif path.exists(img_path):
+            return img_path, [img_path], None
         else:
             raise ValueError('File does not exists')
+        if not all(path.exists(file_path) for file_path in files.values()):
+            raise ValueError('File does not exists')
+        if self.band_names is None:
+            names = list(files)
+        else:
+            unknown = [band for band in files if band not in self.band_names]
+            if unknown:
+                raise InvalidBand(f"{unknown} are not bands of {type(self).__name__}, "
+                                  f"its bands are {self.band_names}")
+            names = [band for band in self.band_names if band in files]
+        files = [files[band] for band in names]
+        return stack_vrt(files), files, names
+
+    @contextlib.contextmanager
+    def _open(self):
+        """Opens the image, every read goes through here"""
+        with rasterio.open(self._source) as dataset:
+            if self._warp is None:
+                yield dataset
+                return
+            with WarpedVRT(dataset, resampling=self.resampling, **self._warp) as warped:
+                yield warped
+
+    def _warp_grid(self, warp):
+        """crs, transform, width and height of the grid of warp"""
+        unknown = set(warp) - {"crs", "resolution", "transform", "width", "height"}
+        if unknown:
+            raise ValueError(f"warp does not take {sorted(unknown)}")
+        if "transform" in warp and not {"width", "height"} <= set(warp):
+            raise ValueError("warp needs the width and the height of the grid of its transform")
+        with rasterio.open(self._source) as dataset:
+            crs = CRS.from_user_input(warp.get("crs", dataset.crs))
+            if "transform" in warp:
+                transform, width, height = warp["transform"], warp["width"], warp["height"]
+            else:
+                transform, width, height = calculate_default_transform(
+                    dataset.crs, crs, dataset.width, dataset.height, *dataset.bounds,
+                    resolution=warp.get("resolution"))
+        return dict(crs=crs, transform=transform, width=width, height=height)
 
     @property
     def dataframe(self):
+        if self.__dataframe is None:
+            self.load()
         return self.__dataframe
 
     @dataframe.setter
@@ -40,74 +169,674 @@ class GeneralSensor:
             raise TypeError("the property of dataframe MUST BE a pandas dataframe")
         self.__dataframe = dataframe
 
-    def __read_metadata_file(self):
+    @property
+    def is_loaded(self):
+        return self.__dataframe is not None
+
+    def load(self):
+        """Reads the pixels of the image into the dataframe property, nothing is read
+        if they are already in memory"""
+        if self.__dataframe is None:
+            with self._open() as dataset:
+                self._to_pandas(dataset)
+        return self
+
+    def release(self):
+        """Frees the dataframe property, including any column added to it, the pixels
+        will be read again from the image the next time the dataframe is used"""
+        self.__dataframe = None
+        return self
+
+    def __read_metadata_file(self, dataset):
         """used in the inicialization of some of the parameters of the instance"""
-        with rasterio.open(self.img_path) as dataset:
-            left, bottom, right, top = dataset.bounds
-            self.bounds = {"left": left, "bottom": bottom,
-                           "right": right, "top": top}
-            self.crs = dataset.crs
-            self.dtypes = dataset.dtypes
-            self.indexes = dataset.indexes
-            self.meta = dataset.meta
-            self.res = dataset.res[0]
-
-    def _to_pandas(self):
-        """used to determinated dataframe property on inicialization"""
-        with rasterio.open(self.img_path) as dataset:
-            rasters = [dataset.read(band).astype(np.dtype(getattr(np, dataset.dtypes[band - 1])))
-                       for band in self.indexes]
-            bands = [pd.Series(raster.flatten().tolist()) for raster in rasters]
-            cols = [f"BAND_{x + 1}" for x in range(len(bands))]
-            df = pd.concat(bands, axis=1, keys=cols)
-            self.__dataframe = df
-
-    def dataframe_to_raster(self, name: str, driver="GTiff"):
+        left, bottom, right, top = dataset.bounds
+        self.bounds = {"left": left, "bottom": bottom,
+                       "right": right, "top": top}
+        self.crs = dataset.crs
+        self.dtypes = dataset.dtypes
+        self.indexes = dataset.indexes
+        self.meta = dataset.meta
+        self.res = dataset.res[0]
+        if self.decimation > 1:
+            height = math.ceil(dataset.height / self.decimation)
+            width = math.ceil(dataset.width / self.decimation)
+            transform = dataset.transform * Affine.scale(dataset.width / width, dataset.height / height)
+            self.meta.update(height=height, width=width, transform=transform)
+            self.res = transform.a
+
+    def __select_bands(self, dataset, bands):
+        """bands are the columns of the dataframe, in the order of the image, and
+        band_indexes the indexes of the image they are read from"""
+        if self._stack_names is not None:
+            names = self._stack_names
+        elif self.band_names is not None:
+            names = list(self.band_names)
+        else:
+            names = [f"BAND_{x}" for x in dataset.indexes]
+        if bands is None:
+            bands = names
+        bands = [getattr(band, "value", band) for band in bands]
+        unknown = [band for band in bands if band not in names]
+        if unknown:
+            raise InvalidBand(f"The image does not have the bands {unknown}, its bands are {names}")
+        self.bands = sorted(set(bands), key=names.index)
+        self.band_indexes = [names.index(band) + 1 for band in self.bands]
+
+    def _to_pandas(self, dataset):
+        """used to determinated dataframe property from an open dataset of the image"""
+        if self.cache is None:
+            stack = self._read_stack(dataset)
+        else:
+            warp = None if self._warp is None else self._warp_to_json(self._warp)
+            key = self.cache.key(self._files, self.band_indexes, self.decimation, self.resampling.name,
+                                 repr(warp))
+            stack = self.cache.load(key, lambda: self._read_stack(dataset))
+        valid = self._valid_pixels(dataset) if self.valid_only else None
+        self.__dataframe = self._stack_to_dataframe(stack, valid)
+
+    def _read_stack(self, dataset):
+        """(bands, rows, cols) array of the selected bands in the dtype of the file"""
+        # one read for the whole stack
+        dtype = self._read_dtype(dataset)
+        if self.n_threads > 1 and self.decimation == 1:
+            return self._read_in_threads(dataset, dtype)
+        return dataset.read(self.band_indexes, out_shape=self._out_shape(), out_dtype=dtype,
+                            resampling=self.resampling)
+
+    def _read_in_threads(self, dataset, dtype):
+        """Reads the bands of dataset into a (bands, rows, cols) array of dtype allocated once.
+        Each band is split in n_threads stripes of rows, aligned to the internal blocks of the
+        image, and the stripes are read by n_threads threads, each one with its own handle
+        of the image because a handle can not be shared between threads. rasterio releases
+        the GIL while GDAL decodes, so compressed images are decoded in parallel"""
+        stack = np.empty((len(self.band_indexes), dataset.height, dataset.width), dtype=dtype)
+        block_rows = dataset.block_shapes[0][0]
+        stripe_rows = math.ceil(math.ceil(dataset.height / self.n_threads) / block_rows) * block_rows
+        stripes = [(position, band,
+                    Window(0, row_off, dataset.width, min(stripe_rows, dataset.height - row_off)))
+                   for position, band in enumerate(self.band_indexes)
+                   for row_off in range(0, dataset.height, stripe_rows)]
+
+        def read(stripes):
+            with self._open() as thread_dataset:
+                for position, band, window in stripes:
+                    thread_dataset.read(band, window=window,
+                                        out=stack[position, window.row_off:window.row_off + window.height])
+
+        with ThreadPoolExecutor(self.n_threads) as executor:
+            # list raises the exceptions of the threads
+            list(executor.map(read, [stripes[start::self.n_threads] for start in range(self.n_threads)]))
+        return stack
+
+    def _read_dtype(self, dataset):
+        """bands with different dtypes are promoted to the smallest dtype that holds all of them"""
+        return np.result_type(*[dataset.dtypes[index - 1] for index in self.band_indexes])
+
+    def _out_shape(self, window=None):
+        """(bands, rows, cols) of the image, or of the window, in the resolution of meta"""
+        if window is None:
+            return len(self.band_indexes), self.meta["height"], self.meta["width"]
+        return len(self.band_indexes), window.height, window.width
+
+    def _source_window(self, dataset, window):
+        """window of dataset read for a window of meta, they differ with decimation"""
+        if self.decimation == 1:
+            return window
+        scale_rows, scale_cols = dataset.height / self.meta["height"], dataset.width / self.meta["width"]
+        return Window(window.col_off * scale_cols, window.row_off * scale_rows,
+                      window.width * scale_cols, window.height * scale_rows)
+
+    def _valid_pixels(self, dataset, window=None):
+        """(rows, cols) bool array, True where the pixel is valid in every selected band"""
+        source = None if window is None else self._source_window(dataset, window)
+        masks = dataset.read_masks(self.band_indexes, window=source, out_shape=self._out_shape(window),
+                                   resampling=self.resampling)
+        return masks.all(axis=0)
+
+    def _stack_to_dataframe(self, stack, valid=None, window=None):
+        """Wraps a (bands, rows, cols) array into a dataframe of one column per band
+        and one row per pixel without copying it, each column is a view of its band.
+        With valid, only the valid pixels are kept, copied into one contiguous row per
+        band, the index is their position in the image and window the part of the image
+        the stack was read from"""
+        values = stack.reshape(stack.shape[0], -1)
+        if valid is None:
+            return pd.DataFrame(values.T, columns=self.bands, copy=False)
+        positions = np.flatnonzero(valid)
+        if window is not None:
+            rows, cols = np.divmod(positions, window.width)
+            positions = (rows + window.row_off) * self.meta["width"] + cols + window.col_off
+        return pd.DataFrame(values[:, valid.ravel()].T, index=positions, columns=self.bands, copy=False)
+
+    def rows_cols(self):
+        """row and col in the image of each pixel of the dataframe"""
+        return np.divmod(self.dataframe.index.to_numpy(), self.meta["width"])
+
+    def iter_windows(self, window_size=None):
+        """Walks the image window by window yielding (window, dataframe) pairs, the
+        dataframe has the same columns of the dataframe property but only the pixels of
+        the window, whose col_off and row_off give its position in the image. With
+        valid_only the dataframes only have the valid pixels of the window.
+
+        Parameters
+        ----------
+        window_size: None to use the internal blocks of the image, an int for square
+            tiles or a (rows, cols) tuple for a grid of tiles of that size
+        """
+        with self._open() as dataset:
+            dtype = self._read_dtype(dataset)
+            for window in self._windows(dataset, window_size):
+                stack = dataset.read(self.band_indexes, window=self._source_window(dataset, window),
+                                     out_shape=self._out_shape(window), out_dtype=dtype,
+                                     resampling=self.resampling)
+                valid = self._valid_pixels(dataset, window) if self.valid_only else None
+                yield window, self._stack_to_dataframe(stack, valid, window)
+
+    def _windows(self, dataset, window_size=None):
+        """windows of the internal blocks of the dataset or of a grid of tiles of window_size,
+        with decimation the blocks of the image are not the ones of meta and a grid of tiles
+        of the size of the blocks is used"""
+        if window_size is None and self.decimation == 1:
+            for _, window in dataset.block_windows(1):
+                yield window
+            return
+        if window_size is None:
+            window_size = dataset.block_shapes[0]
+        rows, cols = (window_size, window_size) if isinstance(window_size, int) else window_size
+        height, width = self.meta["height"], self.meta["width"]
+        for row_off in range(0, height, rows):
+            for col_off in range(0, width, cols):
+                yield Window(col_off, row_off, min(cols, width - col_off), min(rows, height - row_off))
+
+    def band_statistics(self, bands, window_size=None):
+        """{band: (minimum, maximum)} of bands over the pixels of the dataframe property,
+        from the dataframe when it is loaded, otherwise only those bands are read from the
+        image window by window (see iter_windows), the image is never loaded. NaN for an
+        image without pixels"""
+        if self.is_loaded:
+            return {band: (self.dataframe[band].min(), self.dataframe[band].max()) for band in bands}
+        band_indexes = [self.band_indexes[self.bands.index(band)] for band in bands]
+        minimum = np.full(len(bands), np.nan)
+        maximum = np.full(len(bands), np.nan)
+        with self._open() as dataset:
+            dtype = self._read_dtype(dataset)
+            for window in self._windows(dataset, window_size):
+                stack = dataset.read(band_indexes, window=self._source_window(dataset, window),
+                                     out_shape=(len(bands), window.height, window.width), out_dtype=dtype,
+                                     resampling=self.resampling)
+                values = stack.reshape(len(bands), -1)
+                if self.valid_only:
+                    values = values[:, self._valid_pixels(dataset, window).ravel()]
+                if values.shape[1] == 0:
+                    continue
+                minimum = np.fmin(minimum, values.min(axis=1))
+                maximum = np.fmax(maximum, values.max(axis=1))
+        return {band: (minimum[position], maximum[position]) for position, band in enumerate(bands)}
+
+    def dataframe_to_raster(self, name: str, driver="GTiff", dtype=None, **options):
         """Allow to convert the dataframe property into a raster with the same
-        caracteristicis"""
+        caracteristicis, see windows_to_raster for dtype and the options of GTiff"""
         # TODO  the next version it should get the directory and the filename
         # TODO generated the format file automaticaly
+        window = Window(0, 0, self.meta["width"], self.meta["height"])
+        self.windows_to_raster(name, [(window, self.dataframe)], driver=driver, dtype=dtype, **options)
+
+    def windows_to_raster(self, name: str, frames, driver="GTiff", dtype=None, blocksize=256,
+                          compress="deflate", predictor=None, num_threads="ALL_CPUS",
+                          overview_resampling="average", nodata=None, bigtiff="IF_SAFER"):
+        """Writes a raster with the same caracteristicis of the image from (window, dataframe)
+        pairs like the ones of iter_windows, one band per column of the dataframes. The
+        pairs are written as they come so frames can be a generator and only one window
+        is kept in memory.
+        The bands are written as dtype, by default the smallest float that holds every
+        column of the first dataframe: float32 for the bands of the image and the indexes
+        of a float32 transformer, float64 if any column is float64.
+
+        GTiff rasters are tiled in square blocks of blocksize pixels (a multiple of 16) and
+        compressed with compress, None to not compress them. predictor defaults to the
+        floating point predictor for float dtypes and to the horizontal one otherwise.
+        num_threads threads of GDAL compress the blocks. Each dataframe is written block
+        by block of the output with all its bands at once, so each block is compressed
+        once instead of once per band. bigtiff is the BIGTIFF option of GDAL, IF_NEEDED,
+        the default of GDAL, never makes a BigTIFF of a compressed raster and the rasters
+        of the indexes of a whole scene can take more than the 4 GB of a classic TIFF.
+
+        With the COG driver the raster is a cloud optimized GeoTIFF, tiled like a GTiff and
+        with internal overviews made with overview_resampling, so viewers and tile servers
+        can read any window at any zoom with a few range requests. Its bands are described
+        by the names of the columns instead of the name.txt file of the other drivers.
+
+        nodata defaults to the one of the image, with valid_only the pixels that are not in
+        the dataframes are filled with it, NaN for float rasters if it is not given.
+        Categorical columns, like a categorical COBERTURE, are written as their codes, -1
+        for the pixels without category"""
+        frames = ((window, self._categories_to_codes(dataframe)) for window, dataframe in frames)
+        first = next(frames, None)
+        if first is None:
+            raise ValueError("There are no windows to write")
+        columns = first[1].columns.tolist()
+        if dtype is None:
+            dtype = np.result_type(np.float32, *first[1].dtypes)
+        if nodata is None and self.valid_only and np.issubdtype(dtype, np.floating):
+            nodata = np.nan
         meta = self.meta.copy()
-        meta.update(count=len(self.__dataframe.columns))
-        # OPTIMIZEME search for a better way to optimize de dtype while reading
-        #  it seams that the uint dtype can fuck me really hard if i don't fix that
-        meta.update(dtype='float64')
-        meta.update(driver=driver)
-        with rasterio.open(name, 'w+', **meta) as dataset:
-            for index, column in enumerate(self.__dataframe.columns.tolist(), 1):
-                array_column = self.__dataframe[column].to_numpy().reshape((meta["height"], meta["width"]))\
-                    .astype('float64')
-                dataset.write(array_column, index)
-        self._generate_info_of_bands(name)
-
-    def _generate_info_of_bands(self, name):
+        if nodata is not None:
+            meta.update(nodata=nodata)
+        meta.update(count=len(columns), dtype=np.dtype(dtype).name, driver=driver)
+        stacks = ((window, self._frame_to_stack(window, dataframe, meta["dtype"], meta["nodata"]))
+                  for window, dataframe in itertools.chain([first], frames))
+        if driver == "COG":
+            self._write_cog(name, stacks, columns, meta, blocksize, compress, predictor, num_threads,
+                            overview_resampling, bigtiff)
+            return
+        if driver == "GTiff":
+            meta.update(self._gtiff_options(dtype, blocksize, compress, predictor, num_threads, bigtiff))
+        self._write_windows(name, stacks, columns, meta)
+        self._generate_info_of_bands(name, columns)
+
+    @staticmethod
+    def _categories_to_codes(dataframe):
+        """dataframe with the codes of its categorical columns instead of their categories"""
+        categorical = [column for column, dtype in dataframe.dtypes.items()
+                       if isinstance(dtype, pd.CategoricalDtype)]
+        if not categorical:
+            return dataframe
+        return dataframe.assign(**{column: dataframe[column].cat.codes for column in categorical})
+
+    def _frame_to_stack(self, window, dataframe, dtype, nodata):
+        """(bands, rows, cols) array of the pixels of window, the dataframes of the sensors
+        and the transformers hold one contiguous row per column so the transpose does not
+        copy them. With valid_only the pixels of the dataframe are scattered by their index
+        into an array filled with nodata"""
+        values = dataframe.to_numpy(dtype=dtype).T
+        shape = (len(dataframe.columns), window.height, window.width)
+        if not self.valid_only:
+            return values.reshape(shape)
+        stack = np.full(shape, 0 if nodata is None else nodata, dtype=dtype)
+        rows, cols = np.divmod(dataframe.index.to_numpy(), self.meta["width"])
+        stack[:, rows - window.row_off, cols - window.col_off] = values
+        return stack
+
+    @classmethod
+    def _write_windows(cls, name, stacks, columns, meta):
+        """writes the (window, stack) pairs of _frame_to_stack"""
+        with rasterio.open(name, 'w', **meta) as dataset:
+            dataset.descriptions = tuple(columns)
+            block_shape = dataset.block_shapes[0]
+            for window, stack in stacks:
+                for block, (rows, cols) in cls._split_by_blocks(window, block_shape):
+                    dataset.write(stack[:, rows, cols], window=block)
+
+    @classmethod
+    def _write_cog(cls, name, stacks, columns, meta, blocksize, compress, predictor, num_threads,
+                   overview_resampling, bigtiff="IF_SAFER"):
+        """The COG driver can only copy other rasters, so the windows are written into a
+        temporary uncompressed GTiff next to name that is then copied as a COG, the
+        overviews are computed and the blocks compressed by num_threads threads"""
+        meta.update(driver="GTiff", **cls._gtiff_options(meta["dtype"], blocksize, None, None, num_threads,
+                                                          bigtiff))
+        options = dict(blocksize=blocksize, num_threads=num_threads, overview_resampling=overview_resampling,
+                       bigtiff=bigtiff)
+        if compress is not None:
+            predictors = {1: "NO", 2: "STANDARD", 3: "FLOATING_POINT"}
+            options.update(compress=compress, predictor=predictors.get(predictor, predictor or "YES"))
+        with tempfile.TemporaryDirectory(dir=path.dirname(path.abspath(name))) as directory:
+            temporary = path.join(directory, "windows.tif")
+            cls._write_windows(temporary, stacks, columns, meta)
+            with rasterio.Env(GDAL_NUM_THREADS=num_threads):
+                rasterio.shutil.copy(temporary, name, driver="COG", **options)
+
+    @staticmethod
+    def _gtiff_options(dtype, blocksize, compress, predictor, num_threads, bigtiff="IF_SAFER"):
+        """creation options of a tiled and compressed GTiff"""
+        if blocksize % 16:
+            raise ValueError(f"blocksize must be a multiple of 16, not {blocksize}")
+        options = dict(tiled=True, blockxsize=blocksize, blockysize=blocksize, num_threads=num_threads,
+                       bigtiff=bigtiff)
+        if compress is not None:
+            if predictor is None:
+                predictor = 3 if np.issubdtype(dtype, np.floating) else 2
+            options.update(compress=compress, predictor=predictor)
+        return options
+
+    @staticmethod
+    def _split_by_blocks(window, block_shape):
+        """Splits window into the parts that fall in each (rows, cols) block of the output,
+        yields (part, (rows, cols)) where the slices locate the part inside window"""
+        block_rows, block_cols = block_shape
+        row_stop, col_stop = window.row_off + window.height, window.col_off + window.width
+        row = window.row_off
+        while row < row_stop:
+            next_row = min((row // block_rows + 1) * block_rows, row_stop)
+            col = window.col_off
+            while col < col_stop:
+                next_col = min((col // block_cols + 1) * block_cols, col_stop)
+                yield (Window(col, row, next_col - col, next_row - row),
+                       (slice(row - window.row_off, next_row - window.row_off),
+                        slice(col - window.col_off, next_col - window.col_off)))
+                col = next_col
+            row = next_row
+
+    def to_parquet(self, file_path, dataframe=None, **options):
+        """Saves dataframe, the dataframe property if None (e.g. the indexes that a
+        transformer created from this sensor), as a parquet file with the metadata of the
+        sensor (meta, crs, bounds, res...), options are the ones of pyarrow.parquet.write_table.
+        read_parquet loads it back"""
+        pyarrow.parquet.write_table(self._to_arrow(dataframe), file_path, **options)
+
+    def to_feather(self, file_path, dataframe=None, **options):
+        """Like to_parquet but with a feather file, options are the ones of
+        pyarrow.feather.write_feather"""
+        pyarrow.feather.write_feather(self._to_arrow(dataframe), file_path, **options)
+
+    @classmethod
+    def read_parquet(cls, file_path, columns=None):
+        """Sensor with the dataframe and the metadata saved by to_parquet, only the
+        columns given are read from the file, all of them if None"""
+        cls._check_pyarrow()
+        schema = pyarrow.parquet.read_schema(file_path)
+        table = pyarrow.parquet.read_table(file_path, columns=cls._arrow_columns(schema, columns))
+        return cls._from_arrow(table, columns)
+
+    @classmethod
+    def read_feather(cls, file_path, columns=None):
+        """Like read_parquet but with a feather file of to_feather"""
+        cls._check_pyarrow()
+        with pyarrow.ipc.open_file(file_path) as reader:
+            schema = reader.schema
+        table = pyarrow.feather.read_table(file_path, columns=cls._arrow_columns(schema, columns))
+        return cls._from_arrow(table, columns)
+
+    @staticmethod
+    def _check_pyarrow():
+        if pyarrow is None:
+            raise ImportError("Parquet and feather files need pyarrow, install it with pip install pyarrow")
+
+    def _to_arrow(self, dataframe=None):
+        """Table of dataframe with the metadata of the sensor in the metadata of its schema"""
+        self._check_pyarrow()
+        dataframe = self.dataframe if dataframe is None else dataframe
+        meta = dict(self.meta, crs=None if self.crs is None else self.crs.to_wkt(),
+                    transform=list(self.meta["transform"])[:6])
+        metadata = {"img_path": self.img_path, "meta": meta, "bounds": self.bounds, "res": self.res,
+                    "dtypes": list(self.dtypes), "indexes": list(self.indexes), "bands": self.bands,
+                    "band_indexes": self.band_indexes, "valid_only": self.valid_only,
+                    "decimation": self.decimation, "resampling": self.resampling.name,
+                    "source": self._source, "files": self._files, "stack_names": self._stack_names,
+                    "warp": None if self._warp is None else self._warp_to_json(self._warp)}
+        table = pyarrow.Table.from_pandas(dataframe)
+        return table.replace_schema_metadata(dict(table.schema.metadata,
+                                                  feature_raster=json.dumps(metadata)))
+
+    @staticmethod
+    def _warp_to_json(warp):
+        return dict(warp, crs=warp["crs"].to_wkt(), transform=list(warp["transform"])[:6])
+
+    @staticmethod
+    def _arrow_columns(schema, columns):
+        """columns plus the ones of the index of the dataframe, e.g. the positions of the
+        pixels with valid_only"""
+        if columns is None:
+            return None
+        index_columns = schema.pandas_metadata["index_columns"]
+        # a RangeIndex is saved in the metadata, other indexes as columns
+        return list(columns) + [column for column in index_columns
+                                if isinstance(column, str) and column not in columns]
+
+    @classmethod
+    def _from_arrow(cls, table, columns=None):
+        if columns is not None:
+            # in the order of columns, parquet reads them in the order of the file
+            table = table.select(cls._arrow_columns(table.schema, columns))
+        metadata = json.loads(table.schema.metadata[b"feature_raster"])
+        meta = metadata["meta"]
+        meta.update(crs=None if meta["crs"] is None else CRS.from_wkt(meta["crs"]),
+                    transform=Affine(*meta["transform"]))
+        sensor = cls.__new__(cls)
+        sensor.img_path = metadata["img_path"]
+        sensor._source = metadata["source"]
+        sensor._files = metadata["files"]
+        sensor._stack_names = metadata["stack_names"]
+        warp = metadata["warp"]
+        sensor._warp = None if warp is None else dict(warp, crs=CRS.from_wkt(warp["crs"]),
+                                                      transform=Affine(*warp["transform"]))
+        sensor.n_threads = 1
+        sensor.valid_only = metadata["valid_only"]
+        sensor.decimation = metadata["decimation"]
+        sensor.resampling = Resampling[metadata["resampling"]]
+        sensor.cache = None
+        sensor.bounds = metadata["bounds"]
+        sensor.crs = meta["crs"]
+        sensor.dtypes = tuple(metadata["dtypes"])
+        sensor.indexes = tuple(metadata["indexes"])
+        sensor.meta = meta
+        sensor.res = metadata["res"]
+        sensor.bands = metadata["bands"]
+        sensor.band_indexes = metadata["band_indexes"]
+        sensor.cobertures = None
+        sensor.__dataframe = table.to_pandas()
+        return sensor
+
+    @staticmethod
+    def _generate_info_of_bands(name, columns):
         # TODO generate the links of the transfomations
         with open(f"{name}.txt", "w") as f:
-            for index, column in enumerate(self.__dataframe.columns.tolist(), 1):
+            for index, column in enumerate(columns, 1):
                 f.write(f"{index} --> {column} \n")
 
-    def coberture_to_pandas(self, coberture_file, coberture_column="coberture", fillna: int = -9999):
+    def coberture_to_pandas(self, coberture_file, coberture_column="coberture", fillna: int = -9999,
+                            categorical=False, window_size=None, sparse=False):
         """Takes a geodataframe of cobertures created by the user usually using a GIS software
         convert it to a multidimensional array (as a raster) of cobertures
-        with the same dimensions of the working raster and then converted it to a pandas Series"""
+        with the same dimensions of the working raster and then converted it to a pandas Series.
+
+        The integer cobertures are burned into the smallest integer dtype that holds them and
+        fillna, with categorical they are the categories of a categorical Series, of any type,
+        and the pixels without coberture are NaN. With window_size the cobertures are burned
+        window by window (see iter_windows), each one only with the polygons that touch it,
+        for very large or very detailed layers. Only the polygons that intersect the bounds
+        of the image are burned, reprojected to its crs if they are in another one.
+
+        With sparse the dataframe gets no COBERTURE column, only the labelled pixels are kept
+        in the cobertures property, a Series of their cobertures indexed by their position in
+        the image, and select_df_of_cobertures takes just their rows"""
+        shapes, fillna, dtype, categories = self._coberture_shapes(coberture_file, coberture_column, fillna,
+                                                                   categorical)
+        if sparse:
+            positions, burned = self._burn_sparse(shapes, fillna, dtype, window_size)
+            index = pd.Index(positions)
+        else:
+            burned = self._burn(shapes, fillna, dtype, window_size).ravel()
+            if self.valid_only:
+                burned = burned[self.dataframe.index.to_numpy()]
+            index = self.dataframe.index
+        if categorical:
+            burned = pd.Categorical.from_codes(burned, categories=categories)
+        cobertures = pd.Series(burned, index=index, copy=False, name=GeneralSensorEnums.coberture.value)
+        if sparse:
+            self.cobertures = cobertures
+        else:
+            self.cobertures = None
+            self.dataframe[GeneralSensorEnums.coberture.value] = cobertures
+
+    def labelled_to_pandas(self, coberture_file, coberture_column="coberture", fillna: int = -9999,
+                           categorical=False, window_size=None):
+        """The rows of select_df_of_cobertures without loading the image, only the windows
+        (see iter_windows) touched by the cobertures are read and only their labelled pixels
+        are kept, indexed by their position in the image. To build a training set from a
+        lazy sensor in time proportional to the labelled area, see coberture_to_pandas for
+        the parameters"""
+        shapes, fillna, dtype, categories = self._coberture_shapes(coberture_file, coberture_column, fillna,
+                                                                   categorical)
+        frames, cobertures = [], []
+        with self._open() as dataset:
+            read_dtype = self._read_dtype(dataset)
+            for window, burned in self._burn_windows(dataset, shapes, fillna, dtype, window_size):
+                labelled = burned != fillna
+                rows, cols = np.nonzero(labelled)
+                if len(rows) == 0:
+                    continue
+                # only the part of the window around its labelled pixels is read
+                top, left = rows.min(), cols.min()
+                inner = Window(window.col_off + left, window.row_off + top, cols.max() - left + 1,
+                               rows.max() - top + 1)
+                labelled = labelled[top:top + inner.height, left:left + inner.width]
+                if self.valid_only:
+                    labelled &= self._valid_pixels(dataset, inner)
+                stack = dataset.read(self.band_indexes, window=self._source_window(dataset, inner),
+                                     out_shape=self._out_shape(inner), out_dtype=read_dtype,
+                                     resampling=self.resampling)
+                frames.append(self._stack_to_dataframe(stack, labelled, inner))
+                cobertures.append(burned[top:top + inner.height, left:left + inner.width][labelled])
+            if not frames:
+                frames.append(self._stack_to_dataframe(np.empty((len(self.band_indexes), 0, 0), read_dtype),
+                                                       np.empty((0, 0), bool)))
+                cobertures.append(np.empty(0, dtype))
+        dataframe = pd.concat(frames) if len(frames) > 1 else frames[0]
+        cobertures = np.concatenate(cobertures)
+        if categorical:
+            cobertures = pd.Categorical.from_codes(cobertures, categories=categories)
+        dataframe[GeneralSensorEnums.coberture.value] = cobertures
+        return dataframe
+
+    def _coberture_shapes(self, coberture_file, coberture_column, fillna, categorical):
+        """(shapes, fill, dtype, categories) to burn the cobertures of coberture_file, the
+        (geometry, value) shapes of the geometries in the image (see _geometries_in_image)
+        and the smallest dtype that holds the values of the layer and fill, with categorical
+        the values are the codes of categories and fill is -1. The geometries without
+        coberture (NaN) are not burned, float cobertures are burned as integers when they
+        have no decimals, like the ones of a shapefile with empty values"""
         if not isinstance(coberture_file, gpd.GeoDataFrame):
             raise InvalidTypeOfGeom("coberture_file param MUST BE a geopandas.GeoDataFrame object")
 
-        shapes = ((geom, value) for geom, value in zip(coberture_file.geometry,
-                                                       coberture_file[coberture_column]))
-        burned = features.rasterize(shapes=shapes, fill=fillna,
-                                    out_shape=(self.meta["height"], self.meta["width"]),
-                                    transform=self.meta["transform"])
-        burned_to_series = pd.Series(burned.flatten().tolist())
-        self.__dataframe[GeneralSensorEnums.coberture.value] = burned_to_series
+        # the values of the whole layer, so every image gets the same dtype and categories
+        values = coberture_file[coberture_column]
+        labelled = values.notna().to_numpy()
+        categories = None
+        if categorical:
+            classes = pd.Categorical(values)
+            values, fillna, categories = classes.codes, -1, classes.categories
+        elif pd.api.types.is_float_dtype(values) and (values[labelled] % 1 == 0).all():
+            values = values.fillna(fillna).astype(np.int64).to_numpy()
+        elif not pd.api.types.is_integer_dtype(values):
+            raise ValueError(f"The cobertures of {coberture_column} are not integers, use categorical=True")
+        values = np.asarray(values)[labelled]
+        dtype = self._burn_dtype(np.min(values, initial=fillna), np.max(values, initial=fillna))
+        positions, geometries = self._geometries_in_image(coberture_file[labelled])
+        return list(zip(geometries, values[positions])), fillna, dtype, categories
+
+    def _geometries_in_image(self, coberture_file):
+        """(positions, geometries) of the geometries of coberture_file that intersect the
+        bounds of the image, in the crs of the image and clipped to its bounds. The spatial
+        index of the layer discards the other ones before anything is reprojected or
+        clipped. A layer without crs is taken to be in the crs of the image"""
+        geometries = coberture_file.geometry
+        bounds = [self.bounds[side] for side in ("left", "bottom", "right", "top")]
+        reproject = geometries.crs is not None and self.crs is not None and geometries.crs != self.crs.to_wkt()
+        query = transform_bounds(self.crs, CRS.from_wkt(geometries.crs.to_wkt()), *bounds) if reproject else bounds
+        positions = np.sort(geometries.sindex.query(box(*query), predicate="intersects"))
+        geometries = geometries.take(positions)
+        if reproject:
+            geometries = geometries.to_crs(self.crs.to_wkt())
+        # only the geometries that cross the bounds are clipped, the polygons that only
+        # touch the bounds would become lines along the border of the image
+        extent = box(*bounds)
+        crossing = ~geometries.within(extent).to_numpy()
+        geometries = geometries.tolist()
+        for position in np.flatnonzero(crossing):
+            clipped = geometries[position].intersection(extent)
+            geometries[position] = self._polygonal(clipped) if geometries[position].area > 0 else clipped
+        inside = np.array([not geometry.is_empty for geometry in geometries], dtype=bool)
+        return positions[inside], [geometry for geometry, kept in zip(geometries, inside) if kept]
+
+    @staticmethod
+    def _polygonal(geometry):
+        """the polygons of a clipped polygon, without the lines or points where it only
+        touches the border, empty if it has no area left"""
+        if geometry.geom_type in ("Polygon", "MultiPolygon"):
+            return geometry
+        parts = getattr(geometry, "geoms", [])
+        polygons = [polygon for part in parts if part.geom_type in ("Polygon", "MultiPolygon")
+                    for polygon in getattr(part, "geoms", [part])]
+        return MultiPolygon(polygons)
+
+    @staticmethod
+    def _burn_dtype(minimum, maximum):
+        """smallest integer dtype that rasterio can burn that holds minimum and maximum"""
+        for dtype in ["uint8", "int16", "uint16", "int32", "uint32"]:
+            if np.iinfo(dtype).min <= minimum and maximum <= np.iinfo(dtype).max:
+                return dtype
+        raise ValueError(f"The cobertures between {minimum} and {maximum} do not fit in 32 bits")
+
+    def _burn(self, shapes, fill, dtype, window_size=None):
+        """(rows, cols) array of the (geometry, value) shapes burned in the grid of meta"""
+        shape = (self.meta["height"], self.meta["width"])
+        if window_size is None:
+            return features.rasterize(shapes, out_shape=shape, fill=fill, transform=self.meta["transform"],
+                                      dtype=dtype)
+        burned = np.full(shape, fill, dtype=dtype)
+        with self._open() as dataset:
+            for window, values in self._burn_windows(dataset, shapes, fill, dtype, window_size):
+                burned[window.toslices()] = values
+        return burned
+
+    def _burn_sparse(self, shapes, fill, dtype, window_size=None):
+        """(positions, values) of the pixels where the (geometry, value) shapes are burned,
+        only the valid ones with valid_only, window by window there is never an array of
+        the size of the image"""
+        width = self.meta["width"]
+        if window_size is None:
+            burned = self._burn(shapes, fill, dtype)
+            positions = np.flatnonzero(burned != fill)
+            values = burned.ravel()[positions]
+        else:
+            positions, values = [], []
+            with self._open() as dataset:
+                for window, burned in self._burn_windows(dataset, shapes, fill, dtype, window_size):
+                    rows, cols = np.nonzero(burned != fill)
+                    positions.append((rows + window.row_off) * width + cols + window.col_off)
+                    values.append(burned[rows, cols])
+            positions = np.concatenate(positions) if positions else np.empty(0, dtype=np.int64)
+            values = np.concatenate(values) if values else np.empty(0, dtype=dtype)
+        if self.valid_only:
+            valid = self.dataframe.index.get_indexer(positions) >= 0
+            positions, values = positions[valid], values[valid]
+        return positions, values
+
+    def _burn_windows(self, dataset, shapes, fill, dtype, window_size):
+        """(window, array) of the windows of dataset (see iter_windows) touched by the
+        (geometry, value) shapes with the shapes that touch it burned"""
+        index = gpd.GeoSeries([geometry for geometry, _ in shapes]).sindex
+        for window in self._windows(dataset, window_size):
+            bounds = windows.bounds(window, self.meta["transform"])
+            touching = index.query(box(*bounds))
+            if len(touching) == 0:
+                continue
+            yield window, features.rasterize(
+                [shapes[position] for position in touching], out_shape=(window.height, window.width),
+                fill=fill, transform=windows.transform(window, self.meta["transform"]), dtype=dtype)
 
     def select_df_of_cobertures(self, fill_na: int = -9999):
         """This method its the first version to deal with the image and the cobertur file
         THIS its the most important feature here, cause this is how you will play with sklearn."""
         # TODO think if the fill_na on this methon an on coberture_to_raster should be a instance variable
         #  or perphaps a class variable
-        if GeneralSensorEnums.coberture.value not in self.__dataframe.columns.tolist():
+        if self.cobertures is not None:
+            return self._gather_cobertures()
+        if not self.is_loaded or GeneralSensorEnums.coberture.value not in self.dataframe.columns.tolist():
             raise NoCobertureSeries("There is no coberture series in the dataframe property, "
                                     "did u use coberture_to_raster method?")
-        return self.__dataframe[self.__dataframe[GeneralSensorEnums.coberture.value] != fill_na]
+        dataframe = self.dataframe
+        cobertures = dataframe[GeneralSensorEnums.coberture.value]
+        if isinstance(cobertures.dtype, pd.CategoricalDtype):
+            return dataframe[cobertures.notna()]
+        return dataframe[cobertures != fill_na]
+
+    def _gather_cobertures(self):
+        """rows of the dataframe of the pixels in cobertures, with their COBERTURE"""
+        rows = self.dataframe.index.get_indexer(self.cobertures.index)
+        found = rows >= 0
+        dataframe = self.dataframe.take(rows[found])
+        dataframe[GeneralSensorEnums.coberture.value] = self.cobertures.array[found]
+        return dataframe
 
@@ -3,11 +3,13 @@ from feature_raster.project_enums import LandsatEnums
 
 
 class Landsat5(GeneralSensor):
-    def __init__(self, img_path):
-        GeneralSensor.__init__(self, img_path)
-        # band names found here
-        # https://www.usgs.gov/land-resources/nli/landsat/landsat-5
-        self.dataframe.columns = [LandsatEnums.blue.value, LandsatEnums.red.value, LandsatEnums.green.value,
-                                  LandsatEnums.nir.value, LandsatEnums.swir1.value, LandsatEnums.swir2.value,
-                                  LandsatEnums.quality.value]
-
+    # band names found here
+    # https://www.usgs.gov/land-resources/nli/landsat/landsat-5
+    band_names = [LandsatEnums.blue.value, LandsatEnums.red.value, LandsatEnums.green.value,
+                  LandsatEnums.nir.value, LandsatEnums.swir1.value, LandsatEnums.swir2.value,
+                  LandsatEnums.quality.value]
+    # USGS products, LT05_..._B3.TIF, the quality band is BQA in collection 1 and QA_PIXEL in collection 2
+    product_bands = {LandsatEnums.blue.value: ["B1"], LandsatEnums.green.value: ["B2"],
+                     LandsatEnums.red.value: ["B3"], LandsatEnums.nir.value: ["B4"],
+                     LandsatEnums.swir1.value: ["B5"], LandsatEnums.swir2.value: ["B7"],
+                     LandsatEnums.quality.value: ["BQA", "QA_PIXEL"]}
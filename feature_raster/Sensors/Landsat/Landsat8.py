@@ -3,11 +3,14 @@ from feature_raster.project_enums import LandsatEnums
 
 
 class Landsat8(GeneralSensor):
-    def __init__(self, img_path):
-        GeneralSensor.__init__(self, img_path)
-        # Band names were found here
-        # https://landsat.gsfc.nasa.gov/landsat-8/landsat-8-bands/
-        # TODO all bands should be used here, maybe not pancromatic, at least for now
-        self.dataframe.columns = [LandsatEnums.coastal.value, LandsatEnums.blue.value, LandsatEnums.green.value,
-                                  LandsatEnums.red.value, LandsatEnums.nir.value, LandsatEnums.swir1.value,
-                                  LandsatEnums.swir2.value, LandsatEnums.quality.value]
+    # Band names were found here
+    # https://landsat.gsfc.nasa.gov/landsat-8/landsat-8-bands/
+    # TODO all bands should be used here, maybe not pancromatic, at least for now
+    band_names = [LandsatEnums.coastal.value, LandsatEnums.blue.value, LandsatEnums.green.value,
+                  LandsatEnums.red.value, LandsatEnums.nir.value, LandsatEnums.swir1.value,
+                  LandsatEnums.swir2.value, LandsatEnums.quality.value]
+    # USGS products, LC08_..._B4.TIF, the quality band is BQA in collection 1 and QA_PIXEL in collection 2
+    product_bands = {LandsatEnums.coastal.value: ["B1"], LandsatEnums.blue.value: ["B2"],
+                     LandsatEnums.green.value: ["B3"], LandsatEnums.red.value: ["B4"],
+                     LandsatEnums.nir.value: ["B5"], LandsatEnums.swir1.value: ["B6"],
+                     LandsatEnums.swir2.value: ["B7"], LandsatEnums.quality.value: ["BQA", "QA_PIXEL"]}
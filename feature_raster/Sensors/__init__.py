@@ -1 +1,2 @@
 from .GeneralSensor import GeneralSensor
+from .BandCache import BandCache
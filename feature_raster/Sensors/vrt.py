@@ -0,0 +1,60 @@
+import os
+import xml.etree.ElementTree as ElementTree
+
+import rasterio
+
+from feature_raster.exceptions import InvalidImage
+
+# names of the data types of GDAL
+GDAL_TYPES = {"uint8": "Byte", "int8": "Int8", "uint16": "UInt16", "int16": "Int16", "uint32": "UInt32",
+              "int32": "Int32", "float32": "Float32", "float64": "Float64"}
+
+
+def find_product_files(directory, product_bands):
+    """{band name: file} of the files of a product with one file per band, like the
+    ones of USGS (LC08_..._B4.TIF), product_bands has the suffixes that can end the name
+    of the file of each band, e.g. {"RED": ["B4"], "QUALITY": ["BQA", "QA_PIXEL"]}. The
+    bands without a file are left out"""
+    names = sorted(os.listdir(directory))
+    files = {}
+    for band, suffixes in product_bands.items():
+        endings = tuple(f"_{suffix}.TIF".upper() for suffix in suffixes)
+        matches = [name for name in names if name.upper().endswith(endings)]
+        if matches:
+            files[band] = os.path.join(directory, matches[0])
+    return files
+
+
+def stack_vrt(files):
+    """XML of a VRT that stacks the first band of each file, in order, as the bands of a
+    single image without writing them into a new file, rasterio opens it as any other
+    image. The files must share the same grid, like the bands of a landsat product"""
+    root = None
+    for position, file_path in enumerate(files, 1):
+        with rasterio.open(file_path) as dataset:
+            if root is None:
+                grid = (dataset.width, dataset.height, dataset.transform, dataset.crs)
+                root = ElementTree.Element("VRTDataset", rasterXSize=str(dataset.width),
+                                           rasterYSize=str(dataset.height))
+                if dataset.crs is not None:
+                    ElementTree.SubElement(root, "SRS").text = dataset.crs.to_wkt()
+                ElementTree.SubElement(root, "GeoTransform").text = ", ".join(
+                    repr(value) for value in dataset.transform.to_gdal())
+            elif grid != (dataset.width, dataset.height, dataset.transform, dataset.crs):
+                raise InvalidImage(f"{file_path} is not in the grid of {files[0]}")
+            data_type = GDAL_TYPES[dataset.dtypes[0]]
+            band = ElementTree.SubElement(root, "VRTRasterBand", dataType=data_type, band=str(position))
+            if dataset.nodata is not None:
+                ElementTree.SubElement(band, "NoDataValue").text = repr(dataset.nodata)
+            source = ElementTree.SubElement(band, "SimpleSource")
+            filename = ElementTree.SubElement(source, "SourceFilename", relativeToVRT="0")
+            filename.text = os.path.abspath(file_path)
+            ElementTree.SubElement(source, "SourceBand").text = "1"
+            block_rows, block_cols = dataset.block_shapes[0]
+            ElementTree.SubElement(source, "SourceProperties", RasterXSize=str(dataset.width),
+                                   RasterYSize=str(dataset.height), DataType=data_type,
+                                   BlockXSize=str(block_cols), BlockYSize=str(block_rows))
+            size = dict(xOff="0", yOff="0", xSize=str(dataset.width), ySize=str(dataset.height))
+            ElementTree.SubElement(source, "SrcRect", **size)
+            ElementTree.SubElement(source, "DstRect", **size)
+    return ElementTree.tostring(root, encoding="unicode")
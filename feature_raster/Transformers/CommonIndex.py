@@ -1,5 +1,8 @@
 from sklearn.base import BaseEstimator, TransformerMixin
 import numpy as np
+
+from .subexpressions import normalized_difference
+
 # to avoid the warning o generating a RuntimeWarning
 np.seterr(divide='ignore', invalid='ignore')
 
@@ -13,13 +16,12 @@ def normalize_difference_indexes_minus_plus(band_1, band_2):
     __________
     band_1: numpy array
     band_2: numpy array
+
+    float bands keep their dtype, other bands are computed as float64
     """
-    numerator = np.subtract(band_2, band_1, dtype=np.float64)
-    denominator = np.add(band_1, band_2, dtype=np.float64)
-    index = np.where(band_2 + band_1 == 0.,
-                     0.,
-                     numerator / denominator)
-    return index
+    band_1, band_2 = [band if np.issubdtype(band.dtype, np.floating) else band.astype(np.float64)
+                      for band in (band_1, band_2)]
+    return normalized_difference(band_2, band_1)
 
 
 class CommonIndex(BaseEstimator, TransformerMixin):
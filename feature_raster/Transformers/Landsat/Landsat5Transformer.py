@@ -4,13 +4,12 @@ from .LandsatCommonTransformer import LandsatGeneralTransformer
 
 
 class Landsat5Transformer(LandsatGeneralTransformer):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, indices=None, engine="numpy", dtype="float32"):
+        super().__init__(indices=indices, engine=engine, dtype=dtype)
 
     def fit(self, x, y=None):
         return self
 
-    def transform(self, landsat5object):
+    def _check_image(self, landsat5object):
         if not isinstance(landsat5object, Landsat5):
             raise InvalidImage("Image must be a landsat5 object")
-        return super().transform(landsat5object)
@@ -1,138 +1,158 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
 from sklearn.base import BaseEstimator, TransformerMixin
-from feature_raster.project_enums import LandsatEnums
+from feature_raster.exceptions import InvalidImage
+from feature_raster.project_enums import GeneralSensorEnums, LandsatEnums
 
-from .indexes import *
+from .engines import ENGINES
+from .index_registry import LANDSAT_INDEXES, resolve_indexes
 
 
 class LandsatGeneralTransformer(BaseEstimator, TransformerMixin):
-    def __init__(self, cirrus=False):
+    # indexes created when indices is None, bgi needs the coastal band of landsat 8
+    default_indices = [name for name in LANDSAT_INDEXES if name != LandsatEnums.bgi.value]
+
+    def __init__(self, cirrus=False, indices=None, engine="numpy", dtype="float32"):
+        """
+        Parameters
+        ----------
+        indices: names of the indexes to create (see index_registry.LANDSAT_INDEXES), None
+            for all of them. The indexes they depend on are computed but not returned
+        engine: "numpy" to use the functions of indexes.py, "numexpr" to evaluate each
+            index as a single numexpr expression, without temporaries and multithreaded, or
+            "numba" to compute all the indexes of a pixel in one parallel pass over the pixels
+        dtype: float dtype of the bands and the indexes returned, float32 takes half the
+            memory and disk of float64 and it is precise enough for the indexes
+        """
         self.cirrus = cirrus
+        self.indices = indices
+        self.engine = engine
+        self.dtype = dtype
 
     def fit(self, x, y=None):
         return self
 
     def transform(self, landsatobject):
-        x = landsatobject.dataframe.copy()
-        x[LandsatEnums.ndvi.value] = normalize_difference_indexes_minus_plus(x[LandsatEnums.red.value],
-                                                                             x[LandsatEnums.nir.value])
-        x[LandsatEnums.atsavi.value] = atsavi(x[LandsatEnums.nir.value], x[LandsatEnums.red.value])
-        x[LandsatEnums.afri1600.value] = afri1600(swir_1=x[LandsatEnums.swir1.value],
-                                                  nir=x[LandsatEnums.nir.value])
-        x[LandsatEnums.alteration.value] = alteration(x[LandsatEnums.swir1.value],
-                                                      x[LandsatEnums.swir2.value])
-        x[LandsatEnums.avi.value] = avi(x[LandsatEnums.nir.value],
-                                        x[LandsatEnums.red.value])
-        x[LandsatEnums.arvi2.value] = arvi2(x[LandsatEnums.red.value], x[LandsatEnums.nir.value])
-        x[LandsatEnums.bwdrvi.value] = bwdrvi(x[LandsatEnums.blue.value], x[LandsatEnums.nir.value])
-        x[LandsatEnums.ci_green.value] = ci_green(x[LandsatEnums.nir.value], x[LandsatEnums.green.value])
-        x[LandsatEnums.cvi.value] = cvi(x[LandsatEnums.nir.value], x[LandsatEnums.green.value],
-                                        x[LandsatEnums.red.value])
-        x[LandsatEnums.ci.value] = ci(x[LandsatEnums.red.value], x[LandsatEnums.blue.value])
-        x[LandsatEnums.ctvi.value] = ctvi(x[LandsatEnums.ndvi.value])
-        x[LandsatEnums.cri550.value] = cri550(x[LandsatEnums.blue.value], x[LandsatEnums.green.value])
-        x[LandsatEnums.gdvi.value] = gdvi(x[LandsatEnums.green.value], x[LandsatEnums.nir.value])
-        x[LandsatEnums.dvimss.value] = dvimss(x[LandsatEnums.nir.value], x[LandsatEnums.red.value])
-        x[LandsatEnums.evi.value] = evi(x[LandsatEnums.nir.value],
-                                        x[LandsatEnums.red.value],
-                                        x[LandsatEnums.blue.value])
-        x[LandsatEnums.evi2.value] = evi2(x[LandsatEnums.nir.value], x[LandsatEnums.red.value])
-        x[LandsatEnums.evi22.value] = evi22(x[LandsatEnums.nir.value], x[LandsatEnums.red.value])
-        x[LandsatEnums.fe2plus.value] = fe2plus(x[LandsatEnums.green.value], x[LandsatEnums.nir.value],
-                                                x[LandsatEnums.swir2.value])
-        x[LandsatEnums.ferricoxides.value] = ferric_oxides(x[LandsatEnums.nir.value],
-                                                           x[LandsatEnums.swir1.value])
-        x[LandsatEnums.ferrous_iron.value] = ferrous_iron(x[LandsatEnums.swir2.value],
-                                                          x[LandsatEnums.nir.value],
-                                                          x[LandsatEnums.green.value])
-        x[LandsatEnums.ferrous_silicates.value] = ferrous_silicates(x[LandsatEnums.swir1.value],
-                                                                    x[LandsatEnums.swir2.value])
-        x[LandsatEnums.gemi.value] = gemi(x[LandsatEnums.red.value], x[LandsatEnums.nir.value])
-        x[LandsatEnums.gvmi.value] = gvmi(x[LandsatEnums.nir.value], x[LandsatEnums.swir2.value])
-        x[LandsatEnums.gossan.value] = gossan(x[LandsatEnums.red.value], x[LandsatEnums.swir1.value])
-        x[LandsatEnums.gari.value] = gari(x[LandsatEnums.blue.value], x[LandsatEnums.green.value],
-                                          x[LandsatEnums.red.value], x[LandsatEnums.nir.value])
-        x[LandsatEnums.gli.value] = gli(x[LandsatEnums.blue.value], x[LandsatEnums.green.value],
-                                        x[LandsatEnums.red.value])
-        x[LandsatEnums.gndvi.value] = gndvi(x[LandsatEnums.nir.value], x[LandsatEnums.green.value])
-        x[LandsatEnums.gosavi.value] = gosavi(x[LandsatEnums.green.value], x[LandsatEnums.nir.value])
-        x[LandsatEnums.gsavi.value] = gsavi(x[LandsatEnums.green.value], x[LandsatEnums.nir.value])
-        x[LandsatEnums.gbndvi.value] = gbndvi(x[LandsatEnums.blue.value], x[LandsatEnums.green.value],
-                                              x[LandsatEnums.nir.value])
-        x[LandsatEnums.grndvi.value] = grndvi(x[LandsatEnums.red.value], x[LandsatEnums.green.value],
-                                              x[LandsatEnums.nir.value])
-        x[LandsatEnums.hue.value] = hue(x[LandsatEnums.red.value], x[LandsatEnums.green.value],
-                                        x[LandsatEnums.blue.value])
-        x[LandsatEnums.intensity.value] = intensity(x[LandsatEnums.red.value], x[LandsatEnums.green.value],
-                                                    x[LandsatEnums.blue.value])
-        x[LandsatEnums.laterite.value] = laterite(x[LandsatEnums.swir1.value], x[LandsatEnums.swir2.value])
-        x[LandsatEnums.logratio.value] = logratio(x[LandsatEnums.red.value], x[LandsatEnums.nir.value])
-        x[LandsatEnums.mcrig.value] = mcrig(x[LandsatEnums.blue.value], x[LandsatEnums.green.value],
-                                            x[LandsatEnums.nir.value])
-        x[LandsatEnums.mvi.value] = mvi(x[LandsatEnums.nir.value], x[LandsatEnums.swir1.value])
-        x[LandsatEnums.msrnir_red.value] = msrnir_red(x[LandsatEnums.red.value], x[LandsatEnums.nir.value])
-        x[LandsatEnums.norm_r.value] = norm_r(x[LandsatEnums.red.value], x[LandsatEnums.green.value],
-                                              x[LandsatEnums.nir.value])
-        x[LandsatEnums.norm_nir.value] = norm_nir(x[LandsatEnums.red.value], x[LandsatEnums.green.value],
-                                                  x[LandsatEnums.nir.value])
-        x[LandsatEnums.norm_g.value] = norm_g(x[LandsatEnums.red.value], x[LandsatEnums.green.value],
-                                              x[LandsatEnums.nir.value])
-        x[LandsatEnums.nli.value] = nli(x[LandsatEnums.red.value], x[LandsatEnums.nir.value])
-        x[LandsatEnums.ppr.value] = ppr(x[LandsatEnums.blue.value], x[LandsatEnums.green.value])
-        x[LandsatEnums.pvr.value] = pvr(x[LandsatEnums.red.value], x[LandsatEnums.green.value])
-        x[LandsatEnums.siwsi.value] = siwsi(x[LandsatEnums.nir.value], x[LandsatEnums.swir1.value])
-        x[LandsatEnums.bndvi.value] = bndvi(x[LandsatEnums.blue.value], x[LandsatEnums.nir.value])
-        x[LandsatEnums.mndvi.value] = mndvi(x[LandsatEnums.nir.value], x[LandsatEnums.swir2.value])
-        x[LandsatEnums.ri.value] = ri(x[LandsatEnums.red.value], x[LandsatEnums.green.value])
-        x[LandsatEnums.ndsi.value] = ndsi(x[LandsatEnums.swir1.value], x[LandsatEnums.swir2.value])
-        x[LandsatEnums.ndvic.value] = ndvic(x[LandsatEnums.red.value], x[LandsatEnums.nir.value],
-                                            x[LandsatEnums.swir1.value], x[LandsatEnums.swir2.value])
-        x[LandsatEnums.pndvi.value] = pndvi(x[LandsatEnums.red.value], x[LandsatEnums.green.value],
-                                            x[LandsatEnums.blue.value], x[LandsatEnums.nir.value])
-        x[LandsatEnums.rbndvi.value] = rbndvi(x[LandsatEnums.red.value], x[LandsatEnums.blue.value],
-                                              x[LandsatEnums.nir.value])
-        x[LandsatEnums.if_index.value] = if_index(x[LandsatEnums.red.value], x[LandsatEnums.green.value],
-                                                  x[LandsatEnums.blue.value])
-        x[LandsatEnums.tm5_tm7.value] = tm5_tm7(x[LandsatEnums.swir1.value], x[LandsatEnums.swir2.value])
-
-        x[LandsatEnums.sr550_670.value] = sr550_670(x[LandsatEnums.red.value], x[LandsatEnums.green.value])
-        x[LandsatEnums.sr860_550.value] = sr860_550(x[LandsatEnums.green.value],
-                                                    x[LandsatEnums.nir.value])
-        x[LandsatEnums.rdi.value] = rdi(x[LandsatEnums.nir.value], x[LandsatEnums.swir2.value])
-        x[LandsatEnums.srmir_red.value] = srmir_red(x[LandsatEnums.red.value], x[LandsatEnums.swir2.value])
-        x[LandsatEnums.grvi.value] = grvi(x[LandsatEnums.green.value], x[LandsatEnums.nir.value])
-        x[LandsatEnums.srnir_mir.value] = srnir_mir(x[LandsatEnums.nir.value], x[LandsatEnums.swir2.value])
-        x[LandsatEnums.dvi.value] = dvi(x[LandsatEnums.red.value], x[LandsatEnums.nir.value])
-        x[LandsatEnums.io.value] = io(x[LandsatEnums.red.value], x[LandsatEnums.blue.value])
-        x[LandsatEnums.rgr.value] = rgr(x[LandsatEnums.red.value], x[LandsatEnums.green.value])
-        x[LandsatEnums.ssred_nir.value] = ssred_nir(x[LandsatEnums.red.value], x[LandsatEnums.nir.value])
-        x[LandsatEnums.swir1_nir.value] = swir_1_nir(x[LandsatEnums.nir.value], x[LandsatEnums.swir1.value])
-        x[LandsatEnums.sarvi2.value] = sarvi2(x[LandsatEnums.red.value], x[LandsatEnums.blue.value],
-                                              x[LandsatEnums.nir.value])
-        x[LandsatEnums.sbl.value] = sbl(x[LandsatEnums.red.value], x[LandsatEnums.nir.value])
-        x[LandsatEnums.sci.value] = sci(x[LandsatEnums.nir.value], x[LandsatEnums.swir1.value])
-        x[LandsatEnums.slavi.value] = slavi(x[LandsatEnums.red.value], x[LandsatEnums.nir.value],
-                                            x[LandsatEnums.swir2.value])
-        x[LandsatEnums.sqrt_nir_ir.value] = sqrt_nir_ir(x[LandsatEnums.red.value],
-                                                        x[LandsatEnums.nir.value])
-        x[LandsatEnums.tas_bri.value] = tass_brig(x[LandsatEnums.red.value],
-                                                  x[LandsatEnums.blue.value],
-                                                  x[LandsatEnums.green.value],
-                                                  x[LandsatEnums.nir.value],
-                                                  x[LandsatEnums.swir2.value])
-        x[LandsatEnums.tas_veg.value] = tass_veg(x[LandsatEnums.red.value], x[LandsatEnums.blue.value],
-                                                 x[LandsatEnums.green.value], x[LandsatEnums.nir.value],
-                                                 x[LandsatEnums.swir1.value], x[LandsatEnums.swir2.value])
-        x[LandsatEnums.tas_wet.value] = tass_wet(x[LandsatEnums.red.value], x[LandsatEnums.blue.value],
-                                                 x[LandsatEnums.green.value], x[LandsatEnums.nir.value],
-                                                 x[LandsatEnums.swir1.value], x[LandsatEnums.swir2.value])
-        x[LandsatEnums.t_ndvi.value] = t_ndvi(x[LandsatEnums.red.value], x[LandsatEnums.nir.value])
-        x[LandsatEnums.tvi.value] = tvi(x[LandsatEnums.red.value], x[LandsatEnums.green.value])
-        x[LandsatEnums.varigreen.value] = varigreen(x[LandsatEnums.red.value], x[LandsatEnums.green.value],
-                                                    x[LandsatEnums.blue.value])
-        x[LandsatEnums.wdrvi.value] = wdrvi(x[LandsatEnums.red.value], x[LandsatEnums.nir.value])
-        x[LandsatEnums.ndbi.value] = ndbi(x[LandsatEnums.nir.value], x[LandsatEnums.swir1.value])
-        x[LandsatEnums.bu.value] = bu(x[LandsatEnums.red.value], x[LandsatEnums.nir.value],
-                                      x[LandsatEnums.swir1.value])
-        x[LandsatEnums.mndwi.value] = mndwi(x[LandsatEnums.green.value], x[LandsatEnums.swir1.value])
-        return x
+        self._check_image(landsatobject)
+        return self.transform_dataframe(landsatobject.dataframe)
+
+    def transform_to_raster(self, landsatobject, name, window_size=None, driver="GTiff", blocksize=256,
+                            **options):
+        """Transforms the image window by window writing each transformed window into the
+        raster name before reading the next one, so only one window of the image and of its
+        indexes is in memory at once, see GeneralSensor.iter_windows for window_size and
+        GeneralSensor.windows_to_raster for driver, blocksize and the options of the raster.
+        By default the windows are whole rows of blocks of the output, blocksize rows of
+        the width of the image, so each compressed block of the output is written at once
+        instead of piece by piece from the strips of the image.
+
+        The statistics of the indexes, the minimum and maximum of the swir bands for NDVIC,
+        are the ones of the whole image, taken first in a pass over only those bands"""
+        self._check_image(landsatobject)
+        if window_size is None:
+            window_size = (blocksize, landsatobject.meta["width"])
+        statistics = self.image_statistics(landsatobject, window_size)
+        frames = ((window, self.transform_dataframe(dataframe, statistics))
+                  for window, dataframe in landsatobject.iter_windows(window_size))
+        landsatobject.windows_to_raster(name, frames, driver=driver, blocksize=blocksize, **options)
+
+    def training_set(self, landsatobject, coberture_file, coberture_column="coberture", fillna=-9999,
+                     categorical=False, window_size=None):
+        """The labelled pixels of the image transformed, with their COBERTURE, like
+        transforming the whole image and then keeping the rows of select_df_of_cobertures,
+        but only the windows touched by the cobertures are read and only their labelled
+        pixels are transformed, the image can be lazy. See
+        GeneralSensor.labelled_to_pandas for the parameters.
+
+        The statistics of the indexes, the minimum and maximum of the swir bands for NDVIC,
+        are the ones of the whole image (see image_statistics), like in transform, so the
+        indexes of the training set are the ones the model is applied to"""
+        self._check_image(landsatobject)
+        statistics = self.image_statistics(landsatobject, window_size)
+        dataframe = landsatobject.labelled_to_pandas(coberture_file, coberture_column, fillna, categorical,
+                                                     window_size)
+        cobertures = dataframe.pop(GeneralSensorEnums.coberture.value)
+        dataframe = self.transform_dataframe(dataframe, statistics)
+        dataframe[GeneralSensorEnums.coberture.value] = cobertures
+        return dataframe
+
+    def _check_image(self, landsatobject):
+        pass
+
+    def _requested_indices(self):
+        indices = self.default_indices if self.indices is None else self.indices
+        return list(OrderedDict.fromkeys(getattr(name, "value", name) for name in indices))
+
+    def required_bands(self):
+        """Names of the bands needed by the requested indexes, to read only those bands of
+        the image, e.g. Landsat8(path, bands=transformer.required_bands())"""
+        bands = [column for index in resolve_indexes(self._requested_indices()) for column in index.inputs
+                 if column not in LANDSAT_INDEXES]
+        return list(OrderedDict.fromkeys(bands))
+
+    def image_statistics(self, landsatobject, window_size=None):
+        """{band: (minimum, maximum)} over the whole image of the bands whose statistics are
+        used by the requested indexes, the swir bands for NDVIC, see
+        GeneralSensor.band_statistics"""
+        bands = [index.inputs[index.arguments.index(argument)]
+                 for index in resolve_indexes(self._requested_indices()) for argument, _ in index.statistics]
+        bands = [band for band in OrderedDict.fromkeys(bands) if band in landsatobject.bands]
+        if not bands:
+            return {}
+        return landsatobject.band_statistics(bands, window_size)
+
+    def transform_dataframe(self, dataframe, statistics=None):
+        """Creates the indexes from a dataframe of bands like the dataframe property of the
+        landsat objects, the returned dataframe has the bands followed by the indexes.
+        statistics are the ones of image_statistics when the dataframe is only a part of
+        the image, by default they are the ones of the dataframe. The columns that are not
+        bands, the COBERTURE of coberture_to_pandas or any column that is not numeric, are
+        returned as they are in their place"""
+        if self.engine not in ENGINES:
+            raise ValueError(f"engine must be one of {list(ENGINES)}, not {self.engine}")
+        engine = ENGINES[self.engine]
+        dtype = np.dtype(self.dtype)
+        if not np.issubdtype(dtype, np.floating):
+            raise ValueError(f"dtype must be a float dtype, not {self.dtype}")
+        requested = self._requested_indices()
+        indexes = resolve_indexes(requested)
+        missing = sorted(set(self.required_bands()) - set(dataframe.columns))
+        if missing:
+            raise InvalidImage(f"The image does not have the bands {missing} needed by the indexes")
+        # the bands and the indexes are written into a single float array allocated once,
+        # one contiguous row per column, the indexes that are only needed by other
+        # indexes (NDVI for CTVI) take the last rows and are not returned
+        carried = [column for column in dataframe.columns if column == GeneralSensorEnums.coberture.value
+                   or not pd.api.types.is_numeric_dtype(dataframe[column])]
+        band_columns = [column for column in dataframe.columns if column not in carried]
+        returned = band_columns + requested
+        names = returned + [index.name for index in indexes if index.name not in requested]
+        values = np.empty((len(names), len(dataframe)), dtype=dtype)
+        # the bands (usually uint16) are converted to dtype, the indexes are computed
+        # over floats so differences like nir - red can not wrap around
+        for position, column in enumerate(band_columns):
+            values[position] = dataframe[column].to_numpy()
+        out = values.T
+        positions = {name: position for position, name in enumerate(names)}
+        bands = {column: out[:, positions[column]] for column in band_columns}
+        engine(indexes, bands, out, [positions[index.name] for index in indexes],
+               self._engine_statistics(indexes, statistics, dtype))
+        transformation = pd.DataFrame(out[:, :len(returned)], index=dataframe.index, columns=returned, copy=False)
+        for column in carried:
+            transformation.insert(dataframe.columns.get_loc(column), column, dataframe[column])
+        return transformation
 
+    @staticmethod
+    def _engine_statistics(indexes, statistics, dtype):
+        """{name: value} of the statistics of the indexes (swir1_min...) for the engines,
+        from {band: (minimum, maximum)} statistics"""
+        values = {}
+        for index in indexes:
+            for argument, statistic in index.statistics:
+                column = index.inputs[index.arguments.index(argument)]
+                if column in (statistics or {}):
+                    minimum, maximum = statistics[column]
+                    values[f"{argument}_{statistic}"] = dtype.type(minimum if statistic == "min" else maximum)
+        return values
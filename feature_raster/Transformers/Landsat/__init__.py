@@ -1,3 +1,4 @@
 from .Landsat5Transformer import Landsat5Transformer
 from .Landsat8Transformer import Landsat8Transformer
+from .index_registry import LANDSAT_INDEXES, LandsatIndex, resolve_indexes
 from .indexes import *
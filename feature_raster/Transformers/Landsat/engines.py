@@ -0,0 +1,124 @@
+import functools
+
+import numpy as np
+
+from feature_raster.Transformers.subexpressions import release_terms, shared_subexpressions, term_uses
+from .index_registry import LANDSAT_INDEXES
+
+try:
+    import numexpr
+except ImportError:  # numexpr is optional, it is only needed by the numexpr engine
+    numexpr = None
+
+try:
+    import numba
+except ImportError:  # numba is optional, it is only needed by the numba engine
+    numba = None
+else:
+    @numba.njit
+    def _where(condition, true, false):
+        return true if condition else false
+
+# An engine computes indexes, given by resolve_indexes, from bands, a dict of the columns
+# of the bands as float arrays, and writes each index into its column of out, an
+# (n_pixels, n_columns) array, columns has the column of out of each index. statistics
+# has the statistics of the indexes (swir1_min...) over the whole image when the bands
+# are only a part of it, the missing ones are computed over the bands
+
+
+def _inputs(index, bands, out, positions):
+    """arrays of the inputs of index, the bands and the indexes already written in out"""
+    return [out[:, positions[column]] if column in positions else bands[column] for column in index.inputs]
+
+
+def _statistics(statistics, arrays, given=None):
+    """minimum and maximum of the inputs used by the expression, e.g. swir1_min, the given
+    ones are not computed, NaN for inputs without pixels"""
+    values = {}
+    for name, statistic in statistics:
+        key = f"{name}_{statistic}"
+        if given and key in given:
+            values[key] = given[key]
+        else:
+            values[key] = getattr(np, statistic)(arrays[name]) if arrays[name].size else np.nan
+    return values
+
+
+def numpy_engine(indexes, bands, out, columns, statistics=None):
+    """Creates each index calling its function of indexes.py, the terms shared by the
+    indexes (nir - red, nir / red...) are computed once for the whole call and freed
+    after the last index that uses them, found by a first pass over a single pixel"""
+    positions = {index.name: column for index, column in zip(indexes, columns)}
+    names = dict(bands, **{name: out[:, column] for name, column in positions.items()})
+    pixel = {name: np.zeros(1, dtype=out.dtype) for name in names}
+    uses = term_uses([functools.partial(index.function, *[pixel[column] for column in index.inputs])
+                      for index in indexes], pixel)
+    with shared_subexpressions(names, uses):
+        for index, column in zip(indexes, columns):
+            names = [f"{name}_{statistic}" for name, statistic in index.statistics]
+            given = {name: statistics[name] for name in names if name in (statistics or {})}
+            out[:, column] = index.function(*_inputs(index, bands, out, positions), **given)
+            release_terms()
+
+
+def numexpr_engine(indexes, bands, out, columns, statistics=None):
+    """Creates each index evaluating its expression with numexpr, the whole formula,
+    zero denominator guards included, runs in one multithreaded pass over blocks of the
+    pixels without the full size temporaries of numpy. Indexes without an expression
+    fall back to their function"""
+    if numexpr is None:
+        raise ImportError("The numexpr engine needs numexpr, install it with pip install numexpr")
+    positions = {index.name: column for index, column in zip(indexes, columns)}
+    for index, column in zip(indexes, columns):
+        inputs = _inputs(index, bands, out, positions)
+        if index.expression is None:
+            out[:, column] = index.function(*inputs)
+            continue
+        local_dict = dict(zip(index.arguments, inputs))
+        local_dict.update(_statistics(index.statistics, local_dict, statistics))
+        numexpr.evaluate(index.expression, local_dict=local_dict, out=out[:, column])
+
+
+@functools.lru_cache(maxsize=None)
+def _numba_kernel(names, columns):
+    """Compiles a kernel that computes every index of names for a pixel in the same loop
+    body, the loop over the pixels runs in parallel, writing each one into its column of
+    out. Returns the kernel, the bands and the statistics it takes as arguments, in
+    order, before out"""
+    indexes = [LANDSAT_INDEXES[name] for name in names]
+    bands = []
+    for index in indexes:
+        for column, argument in zip(index.inputs, index.arguments):
+            if column not in LANDSAT_INDEXES and (column, argument) not in bands:
+                bands.append((column, argument))
+    statistics = sorted({statistic for index in indexes for statistic in index.statistics})
+    parameters = [f"{argument}_band" for _, argument in bands] + [f"{name}_{statistic}"
+                                                                  for name, statistic in statistics]
+    lines = [f"def kernel({', '.join(parameters)}, out):",
+             "    for pixel in prange(out.shape[0]):"]
+    lines += [f"        {argument} = {argument}_band[pixel]" for _, argument in bands]
+    for index, column in zip(indexes, columns):
+        lines.append(f"        {index.variable} = {index.expression}")
+        lines.append(f"        out[pixel, {column}] = {index.variable}")
+    namespace = {"prange": numba.prange, "arctan": np.arctan, "log10": np.log10, "sqrt": np.sqrt,
+                 "where": _where}
+    exec("\n".join(lines), namespace)
+    # error_model numpy gives inf and nan on divisions by 0 like numpy, where picks 0 after
+    kernel = numba.njit(parallel=True, error_model="numpy")(namespace["kernel"])
+    return kernel, bands, statistics
+
+
+def numba_engine(indexes, bands, out, columns, statistics=None):
+    """Creates all the indexes in a single parallel pass over the pixels, each pixel
+    reads its bands once and computes its whole row of out. The kernel is compiled the
+    first time a set of indexes is used"""
+    if numba is None:
+        raise ImportError("The numba engine needs numba, install it with pip install numba")
+    if any(index.expression is None for index in indexes):
+        raise ValueError("The numba engine can only create indexes with an expression")
+    kernel, arguments, needed = _numba_kernel(tuple(index.name for index in indexes), tuple(columns))
+    arrays = {argument: bands[column] for column, argument in arguments}
+    kernel(*arrays.values(), *_statistics(needed, arrays, statistics).values(), out)
+
+
+ENGINES = {"numpy": numpy_engine, "numexpr": numexpr_engine, "numba": numba_engine}
@@ -0,0 +1,239 @@
+import re
+from collections import OrderedDict
+
+from feature_raster.exceptions import InvalidIndex
+from feature_raster.project_enums import LandsatEnums
+
+from .indexes import *
+
+COASTAL, BLUE, GREEN, RED = LandsatEnums.coastal, LandsatEnums.blue, LandsatEnums.green, LandsatEnums.red
+NIR, SWIR1, SWIR2, NDVI = LandsatEnums.nir, LandsatEnums.swir1, LandsatEnums.swir2, LandsatEnums.ndvi
+
+
+def _ratio(numerator, denominator):
+    """numexpr version of return_division, 0 where the denominator is 0"""
+    return f"where({denominator} == 0, 0, ({numerator}) / ({denominator}))"
+
+
+GEMI_N = _ratio("2 * (nir ** 2 - red ** 2) + 1.5 * nir + 0.5 * red", "nir + red + 0.5")
+GEMI_EXPRESSION = f"{GEMI_N} * (1 - 0.25 * {GEMI_N}) - red - 0.125 * 1 - red"
+NIR_RED = _ratio("nir", "red")
+LOGRATIO_EXPRESSION = f"where(abs({NIR_RED}) == 0, 0, log10(abs({NIR_RED})))"
+MSRNIR_RED_EXPRESSION = _ratio(f"{NIR_RED} - 1", f"{NIR_RED} + 1")
+NDVIC_EXPRESSION = (_ratio("nir - red", "nir + red") + " * " +
+                    _ratio("1 - swir1 - swir2_min", "swir1_max - swir1_min"))
+
+
+class LandsatIndex:
+    """An index of the catalogue, the function that creates it and the columns it
+    needs, bands or other indexes, in the order of the arguments of the function.
+
+    expression is the same formula as a numexpr expression over the lowercase names of
+    the inputs (red, nir, ndvi...), <input>_min and <input>_max are the minimum and
+    maximum of that input over all the pixels. variable is the lowercase name of the
+    index in the expressions of other indexes"""
+
+    def __init__(self, name, function, inputs, expression=None):
+        self.name = name.value
+        self.variable = name.name
+        self.function = function
+        self.inputs = tuple(column.value for column in inputs)
+        self.arguments = tuple(column.name for column in inputs)
+        self.expression = expression
+        self.statistics = sorted(set(re.findall(r"\b(\w+)_(min|max)\b", expression or "")))
+
+    def __repr__(self):
+        return f"LandsatIndex({self.name}, {self.function.__name__}, {self.inputs})"
+
+
+# every index the landsat transformers know how to create, in the order they are returned
+LANDSAT_INDEXES = OrderedDict((index.name, index) for index in [
+    LandsatIndex(LandsatEnums.ndvi, normalize_difference_indexes_minus_plus, (RED, NIR),
+                 _ratio("nir - red", "red + nir")),
+    LandsatIndex(LandsatEnums.atsavi, atsavi, (NIR, RED),
+                 "1.22 * nir - 1.22 * red - 0.03 * 1.22 * nir + red - 1.22 * 0.03 + 0.08 * (1 + 1.222)"),
+    LandsatIndex(LandsatEnums.afri1600, afri1600, (NIR, SWIR1),
+                 "where(swir1 == 0, 0, ((nir - 0.66) / swir1) * ((nir + 0.66) / swir1))"),
+    LandsatIndex(LandsatEnums.alteration, alteration, (SWIR1, SWIR2),
+                 _ratio("swir1", "swir2")),
+    LandsatIndex(LandsatEnums.avi, avi, (NIR, RED),
+                 _ratio("2", "nir - red")),
+    LandsatIndex(LandsatEnums.arvi2, arvi2, (RED, NIR),
+                 _ratio("-0.18 + 1.17", "nir - red * nir + red")),
+    LandsatIndex(LandsatEnums.bwdrvi, bwdrvi, (BLUE, NIR),
+                 "0.1 * nir - blue * 0.1 * nir + blue"),
+    LandsatIndex(LandsatEnums.ci_green, ci_green, (NIR, GREEN),
+                 "nir * green - 1"),
+    LandsatIndex(LandsatEnums.cvi, cvi, (NIR, GREEN, RED),
+                 _ratio("nir", "red * green")),
+    LandsatIndex(LandsatEnums.ci, ci, (RED, BLUE),
+                 "red - blue * red"),
+    LandsatIndex(LandsatEnums.ctvi, ctvi, (NDVI,),
+                 "(ndvi + 0.5) ** 3"),
+    LandsatIndex(LandsatEnums.cri550, cri550, (BLUE, GREEN),
+                 "(blue * -1) * (green * -1)"),
+    LandsatIndex(LandsatEnums.gdvi, gdvi, (GREEN, NIR),
+                 "nir - green"),
+    LandsatIndex(LandsatEnums.dvimss, dvimss, (NIR, RED),
+                 "2.4 * nir - red"),
+    LandsatIndex(LandsatEnums.evi, evi, (NIR, RED, BLUE),
+                 "2.5 * nir - red * (nir + 6 * red - 7.5 * blue) + 1"),
+    LandsatIndex(LandsatEnums.evi2, evi2, (NIR, RED),
+                 "2.4 * nir - red * nir + red + 1"),
+    LandsatIndex(LandsatEnums.evi22, evi22, (NIR, RED),
+                 "2.5 * nir - red * nir + 2.4 * red + 1"),
+    LandsatIndex(LandsatEnums.fe2plus, fe2plus, (GREEN, NIR, SWIR2),
+                 "swir2 * nir + green"),
+    LandsatIndex(LandsatEnums.ferricoxides, ferric_oxides, (NIR, SWIR1),
+                 "nir * swir1"),
+    LandsatIndex(LandsatEnums.ferrous_iron, ferrous_iron, (SWIR2, NIR, GREEN),
+                 "swir2 * nir + green"),
+    LandsatIndex(LandsatEnums.ferrous_silicates, ferrous_silicates, (SWIR1, SWIR2),
+                 "swir1 * swir2"),
+    LandsatIndex(LandsatEnums.gemi, gemi, (RED, NIR),
+                 GEMI_EXPRESSION),
+    LandsatIndex(LandsatEnums.gvmi, gvmi, (NIR, SWIR2),
+                 _ratio("(nir + 0.1) - (swir2 + 0.02)", "(nir + 0.1) + (swir2 + 0.02)")),
+    LandsatIndex(LandsatEnums.gossan, gossan, (RED, SWIR1),
+                 _ratio("swir1", "red")),
+    LandsatIndex(LandsatEnums.gari, gari, (BLUE, GREEN, RED, NIR),
+                 _ratio("nir - (green - (blue - red))", "nir - (green + (blue - red))")),
+    LandsatIndex(LandsatEnums.gli, gli, (BLUE, GREEN, RED),
+                 _ratio("2 * green - red - blue", "2 * green + red + blue")),
+    LandsatIndex(LandsatEnums.gndvi, gndvi, (NIR, GREEN),
+                 _ratio("nir - green", "green + nir")),
+    LandsatIndex(LandsatEnums.gosavi, gosavi, (GREEN, NIR),
+                 _ratio("nir - green", "nir + green + 0.16")),
+    LandsatIndex(LandsatEnums.gsavi, gsavi, (GREEN, NIR),
+                 _ratio("nir - green", "nir + green + 0.5 * (1 + 0.5)")),
+    LandsatIndex(LandsatEnums.gbndvi, gbndvi, (BLUE, GREEN, NIR),
+                 _ratio("nir - (green + blue)", "nir + (green + blue)")),
+    LandsatIndex(LandsatEnums.grndvi, grndvi, (RED, GREEN, NIR),
+                 _ratio("nir - (green + red)", "nir + (green + red)")),
+    LandsatIndex(LandsatEnums.hue, hue, (RED, GREEN, BLUE),
+                 "arctan(2 * red - green - blue * 30.5 * (green - blue))"),
+    LandsatIndex(LandsatEnums.intensity, intensity, (RED, GREEN, BLUE),
+                 "(1 / 30.5) * (red + green + blue)"),
+    LandsatIndex(LandsatEnums.laterite, laterite, (SWIR1, SWIR2),
+                 _ratio("swir1", "swir2")),
+    LandsatIndex(LandsatEnums.logratio, logratio, (RED, NIR),
+                 LOGRATIO_EXPRESSION),
+    LandsatIndex(LandsatEnums.mcrig, mcrig, (BLUE, GREEN, NIR),
+                 "(blue * (-1) - green * (-1)) * nir"),
+    LandsatIndex(LandsatEnums.mvi, mvi, (NIR, SWIR1),
+                 _ratio("nir", "swir1")),
+    LandsatIndex(LandsatEnums.msrnir_red, msrnir_red, (RED, NIR),
+                 MSRNIR_RED_EXPRESSION),
+    LandsatIndex(LandsatEnums.norm_r, norm_r, (RED, GREEN, NIR),
+                 _ratio("red", "nir + red + green")),
+    LandsatIndex(LandsatEnums.norm_nir, norm_nir, (RED, GREEN, NIR),
+                 _ratio("nir", "nir + red + green")),
+    LandsatIndex(LandsatEnums.norm_g, norm_g, (RED, GREEN, NIR),
+                 _ratio("green", "nir + red + green")),
+    LandsatIndex(LandsatEnums.nli, nli, (RED, NIR),
+                 _ratio("nir * 2 - red", "nir * 2 + red")),
+    LandsatIndex(LandsatEnums.ppr, ppr, (BLUE, GREEN),
+                 _ratio("green - blue", "green + blue")),
+    LandsatIndex(LandsatEnums.pvr, pvr, (RED, GREEN),
+                 _ratio("green - red", "green + red")),
+    LandsatIndex(LandsatEnums.siwsi, siwsi, (NIR, SWIR1),
+                 _ratio("nir - swir1", "nir + swir1")),
+    LandsatIndex(LandsatEnums.bndvi, bndvi, (BLUE, NIR),
+                 _ratio("nir - blue", "nir + blue")),
+    LandsatIndex(LandsatEnums.mndvi, mndvi, (NIR, SWIR2),
+                 _ratio("nir - swir2", "nir + swir2")),
+    LandsatIndex(LandsatEnums.ri, ri, (RED, GREEN),
+                 _ratio("red - green", "red + green")),
+    LandsatIndex(LandsatEnums.ndsi, ndsi, (SWIR1, SWIR2),
+                 _ratio("swir1 - swir2", "swir1 + swir2")),
+    LandsatIndex(LandsatEnums.ndvic, ndvic, (RED, NIR, SWIR1, SWIR2),
+                 NDVIC_EXPRESSION),
+    LandsatIndex(LandsatEnums.pndvi, pndvi, (RED, GREEN, BLUE, NIR),
+                 _ratio("nir - (green + red + blue)", "nir + (green + red + blue)")),
+    LandsatIndex(LandsatEnums.rbndvi, rbndvi, (RED, BLUE, NIR),
+                 _ratio("nir - red + blue", "nir + red + blue")),
+    LandsatIndex(LandsatEnums.if_index, if_index, (RED, GREEN, BLUE),
+                 _ratio("2 * (red - green - blue)", "green - blue")),
+    LandsatIndex(LandsatEnums.tm5_tm7, tm5_tm7, (SWIR1, SWIR2),
+                 _ratio("swir1", "swir2")),
+    LandsatIndex(LandsatEnums.sr550_670, sr550_670, (RED, GREEN),
+                 _ratio("green", "red")),
+    LandsatIndex(LandsatEnums.sr860_550, sr860_550, (GREEN, NIR),
+                 _ratio("nir", "green")),
+    LandsatIndex(LandsatEnums.rdi, rdi, (NIR, SWIR2),
+                 _ratio("swir2", "nir")),
+    LandsatIndex(LandsatEnums.srmir_red, srmir_red, (RED, SWIR2),
+                 _ratio("swir2", "red")),
+    LandsatIndex(LandsatEnums.grvi, grvi, (GREEN, NIR),
+                 _ratio("nir", "green")),
+    LandsatIndex(LandsatEnums.srnir_mir, srnir_mir, (NIR, SWIR2),
+                 _ratio("nir", "swir2")),
+    LandsatIndex(LandsatEnums.dvi, dvi, (RED, NIR),
+                 _ratio("nir", "red")),
+    LandsatIndex(LandsatEnums.io, io, (RED, BLUE),
+                 _ratio("red", "blue")),
+    LandsatIndex(LandsatEnums.rgr, rgr, (RED, GREEN),
+                 _ratio("red", "green")),
+    LandsatIndex(LandsatEnums.ssred_nir, ssred_nir, (RED, NIR),
+                 _ratio("red", "nir")),
+    LandsatIndex(LandsatEnums.swir1_nir, swir_1_nir, (NIR, SWIR1),
+                 _ratio("swir1", "nir")),
+    LandsatIndex(LandsatEnums.sarvi2, sarvi2, (RED, BLUE, NIR),
+                 "2.5 * (nir - red) + (nir + (6 * red) - (7.5 * blue))"),
+    LandsatIndex(LandsatEnums.sbl, sbl, (RED, NIR),
+                 "nir - 2.4 * red"),
+    LandsatIndex(LandsatEnums.sci, sci, (NIR, SWIR1),
+                 _ratio("swir1 - nir", "swir1 + nir")),
+    LandsatIndex(LandsatEnums.slavi, slavi, (RED, NIR, SWIR2),
+                 _ratio("nir", "red + swir2")),
+    LandsatIndex(LandsatEnums.sqrt_nir_ir, sqrt_nir_ir, (RED, NIR),
+                 f"sqrt(abs({_ratio('nir', 'red')}))"),
+    LandsatIndex(LandsatEnums.tas_bri, tass_brig, (RED, BLUE, GREEN, NIR, SWIR2),
+                 "0.3037 * blue + 0.2793 * green + 0.4773 * red + 0.5585 * nir + 0.1863 * swir2"),
+    LandsatIndex(LandsatEnums.tas_veg, tass_veg, (RED, BLUE, GREEN, NIR, SWIR1, SWIR2),
+                 "-0.2848 * blue - 0.2435 * green - 0.5436 * red + 0.7243 * nir + 0.084 * swir1 - 0.18 * swir2"),
+    LandsatIndex(LandsatEnums.tas_wet, tass_wet, (RED, BLUE, GREEN, NIR, SWIR1, SWIR2),
+                 "0.1509 * blue + 0.1973 * green + 0.3279 * red + 0.3406 * nir - 0.7112 * swir1 - 0.4272 * swir2"),
+    LandsatIndex(LandsatEnums.t_ndvi, t_ndvi, (RED, NIR),
+                 _ratio("nir - red", "nir + red + 0.5")),
+    LandsatIndex(LandsatEnums.tvi, tvi, (RED, GREEN),
+                 f"{_ratio('red - green', 'red + green')} + 0.5"),
+    LandsatIndex(LandsatEnums.varigreen, varigreen, (RED, GREEN, BLUE),
+                 _ratio("green - red", "green + red - blue")),
+    LandsatIndex(LandsatEnums.wdrvi, wdrvi, (RED, NIR),
+                 _ratio("0.1 * (nir - red)", "0.1 * (nir + red)")),
+    LandsatIndex(LandsatEnums.ndbi, ndbi, (NIR, SWIR1),
+                 _ratio("swir1 - nir", "swir1 + nir")),
+    LandsatIndex(LandsatEnums.bu, bu, (RED, NIR, SWIR1),
+                 f"{_ratio('swir1 - nir', 'swir1 + nir')} - {_ratio('nir - red', 'nir + red')}"),
+    LandsatIndex(LandsatEnums.mndwi, mndwi, (GREEN, SWIR1),
+                 _ratio("green - swir1", "green + swir1")),
+    LandsatIndex(LandsatEnums.bgi, bgi, (COASTAL, GREEN),
+                 _ratio("coastal", "green")),
+])
+
+
+def resolve_indexes(names):
+    """Returns the LandsatIndex of each name and of the indexes they depend on, ordered
+    so every index comes after the ones it needs, e.g. CTVI comes after NDVI
+
+    Parameters
+    ----------
+    names: names of the indexes in LANDSAT_INDEXES or LandsatEnums members
+    """
+    resolved = OrderedDict()
+
+    def visit(name):
+        if name in resolved:
+            return
+        if name not in LANDSAT_INDEXES:
+            raise InvalidIndex(f"{name} is not an index of the landsat transformers")
+        index = LANDSAT_INDEXES[name]
+        for column in index.inputs:
+            if column in LANDSAT_INDEXES:
+                visit(column)
+        resolved[name] = index
+
+    for name in names:
+        visit(getattr(name, "value", name))
+    return list(resolved.values())
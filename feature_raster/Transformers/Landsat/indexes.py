@@ -4,24 +4,44 @@ import numpy as np
 import pandas as pd
 
 from feature_raster.Transformers import normalize_difference_indexes_minus_plus
+from feature_raster.Transformers.subexpressions import addition, difference, division, normalized_difference
 
 
-def require_pd_series(decorated):
+def _values(arg):
+    return arg.to_numpy() if isinstance(arg, pd.Series) else arg
+
+
+def array_like(decorated):
+    """Lets an index take any array with numpy semantics, numpy arrays, memmaps or dask
+    arrays, and return the same kind of array. pandas Series are computed over their
+    values and the index is returned as a Series with the same index. The keyword
+    arguments can also be numbers or None, like the statistics of ndvic"""
     @functools.wraps(decorated)
     def inner(*args, **kwargs):
-        kwargs_values = [x for x in kwargs.values()]
-        for arg in list(args) + kwargs_values:
-            if not isinstance(arg, pd.Series):
-                raise TypeError(f"{decorated.__name__} only accpets pandas Series")
-        return decorated(*args, **kwargs)
+        series = None
+        for arg in list(args) + [arg for arg in kwargs.values() if arg is not None and not np.isscalar(arg)]:
+            if isinstance(arg, pd.Series):
+                series = arg if series is None else series
+            elif not (hasattr(arg, "shape") and hasattr(arg, "dtype")):
+                raise TypeError(f"{decorated.__name__} only accepts arrays or pandas Series")
+        if series is None:
+            return decorated(*args, **kwargs)
+        args = [_values(arg) for arg in args]
+        kwargs = {key: _values(arg) for key, arg in kwargs.items()}
+        return pd.Series(decorated(*args, **kwargs), index=series.index)
     return inner
 
 
+def _statistic(function, band):
+    """function, np.min or np.max, of band, NaN for a band without pixels"""
+    return function(band) if band.size else np.nan
+
+
 def return_division(numerator, denominator):
     return np.where(denominator == 0., 0., numerator / denominator)
 
 
-@require_pd_series
+@array_like
 def atsavi(nir_band, red_band):
     """ Adjusted transformed soil-adjusted VI
     Parameters
@@ -35,7 +55,7 @@ def atsavi(nir_band, red_band):
     return 1.22 * nir_band - 1.22 * red_band - 0.03 * 1.22 * nir_band + red_band - 1.22 * 0.03 + 0.08 * (1 + 1.222)
 
 
-@require_pd_series
+@array_like
 def afri1600(nir, swir_1):
     """ Aerosol free vegetation index 1600
     Parameters
@@ -50,7 +70,7 @@ def afri1600(nir, swir_1):
     return index
 
 
-@require_pd_series
+@array_like
 def alteration(swir_1, swir_2):
     """ Alteration
     Parameters
@@ -61,10 +81,10 @@ def alteration(swir_1, swir_2):
     for more info please visit:
     # https://www.indexdatabase.de/db/si-single.php?rsindex_id=1=&sensor_id=168
     """
-    return np.where(swir_2 == 0., 0, swir_1 / swir_2)
+    return division(swir_1, swir_2)
 
 
-@require_pd_series
+@array_like
 def avi(nir_band, red_band):
     """ Ashburn Vegetation Index
     Parameters
@@ -75,10 +95,11 @@ def avi(nir_band, red_band):
     for more info please visit:
     # https://www.indexdatabase.de/db/si-single.php?rsindex_id=574=&sensor_id=168
     """
-    return np.where(nir_band - red_band == 0., 0., 2 / (nir_band - red_band))
+    nir_red_difference = difference(nir_band, red_band)
+    return np.where(nir_red_difference == 0., 0., 2 / nir_red_difference)
 
 
-@require_pd_series
+@array_like
 def arvi2(red_band, nir_band):
     """ Atmospherically Resistant Vegetation Index 2
     Parameters
@@ -94,7 +115,7 @@ def arvi2(red_band, nir_band):
     return index
 
 
-@require_pd_series
+@array_like
 def bwdrvi(blue_band, nir_band):
     """ Blue-wide dynamic range vegetation index
     Parameters
@@ -108,7 +129,7 @@ def bwdrvi(blue_band, nir_band):
     return 0.1 * nir_band - blue_band * 0.1 * nir_band + blue_band
 
 
-@require_pd_series
+@array_like
 def ci_green(nir_band, green_band):
     """ Chlorophyll Index Green
         Parameters
@@ -122,7 +143,7 @@ def ci_green(nir_band, green_band):
     return nir_band * green_band - 1
 
 
-@require_pd_series
+@array_like
 def cvi(nir_band, green_band, red_band):
     """ Chlorophyll Vegetation Index
         Parameters
@@ -139,7 +160,7 @@ def cvi(nir_band, green_band, red_band):
     return index
 
 
-@require_pd_series
+@array_like
 def ci(red_band, blue_band):
     """ Coloration Index
     Parameters
@@ -153,7 +174,7 @@ def ci(red_band, blue_band):
     return red_band - (blue_band * red_band)
 
 
-@require_pd_series
+@array_like
 def ctvi(ndvi_band):
     """ Corrected Transformed Vegetation Index
     Parameters
@@ -166,7 +187,7 @@ def ctvi(ndvi_band):
     return (ndvi_band + 0.5) ** 3
 
 
-@require_pd_series
+@array_like
 def cri550(blue_band, green_band):
     """ CRI550
     Parameters
@@ -180,7 +201,7 @@ def cri550(blue_band, green_band):
     return (blue_band * -1) * (green_band * -1)
 
 
-@require_pd_series
+@array_like
 def gdvi(green_band, nir_band):
     """ Difference NIR/Green Green Difference Vegetation Index
     Parameters
@@ -194,7 +215,7 @@ def gdvi(green_band, nir_band):
     return nir_band - green_band
 
 
-@require_pd_series
+@array_like
 def dvimss(nir_band, red_band):
     """ Differenced Vegetation Index MSS
     Parameters
@@ -208,7 +229,7 @@ def dvimss(nir_band, red_band):
     return 2.4 * nir_band - red_band
 
 
-@require_pd_series
+@array_like
 def evi(nir_band, red_band, blue_band):
     """ Enhanced Vegetation Index
     Parameters
@@ -223,7 +244,7 @@ def evi(nir_band, red_band, blue_band):
     return (2.5 * nir_band) - red_band * (nir_band + 6 * red_band - 7.5 * blue_band) + 1
 
 
-@require_pd_series
+@array_like
 def evi2(nir_band, red_band):
     """ Enhanced Vegetation Index 2
     Parameters
@@ -237,7 +258,7 @@ def evi2(nir_band, red_band):
     return 2.4 * nir_band - red_band * nir_band + red_band + 1
 
 
-@require_pd_series
+@array_like
 def evi22(nir_band, red_band):
     """ Enhanced Vegetation Index 2 -2
     Parameters
@@ -251,7 +272,7 @@ def evi22(nir_band, red_band):
     return 2.5 * nir_band - red_band * nir_band + 2.4 * red_band + 1
 
 
-@require_pd_series
+@array_like
 def fe2plus(green_band, nir_band, swir2_band):
     """ Ferric iron, Fe2+
     Parameters
@@ -266,7 +287,7 @@ def fe2plus(green_band, nir_band, swir2_band):
     return swir2_band * nir_band + green_band
 
 
-@require_pd_series
+@array_like
 def ferric_oxides(nir_band, swir1_band):
     """ Ferric iron, Fe3+
     Parameters
@@ -280,7 +301,7 @@ def ferric_oxides(nir_band, swir1_band):
     return nir_band * swir1_band
 
 
-@require_pd_series
+@array_like
 def ferrous_iron(swir2_band, nir_band, green_band):
     """ Ferrous iron
     Parameters
@@ -295,7 +316,7 @@ def ferrous_iron(swir2_band, nir_band, green_band):
     return swir2_band * nir_band + green_band
 
 
-@require_pd_series
+@array_like
 def ferrous_silicates(swir1_band, swir2_band):
     """ Ferrous iron
      Parameters
@@ -309,7 +330,7 @@ def ferrous_silicates(swir1_band, swir2_band):
     return swir1_band * swir2_band
 
 
-@require_pd_series
+@array_like
 def gemi(red_band, nir_band):
     """ Global Vegetation Moisture Index
      Parameters
@@ -327,7 +348,7 @@ def gemi(red_band, nir_band):
     return index
 
 
-@require_pd_series
+@array_like
 def gvmi(nir_band, swir2_band):
     """ Global Vegetation Moisture Index
      Parameters
@@ -343,7 +364,7 @@ def gvmi(nir_band, swir2_band):
     return np.where(denominator == 0., 0., numerator / denominator)
 
 
-@require_pd_series
+@array_like
 def gossan(red_band, swir1_band):
     """ Gossan
      Parameters
@@ -354,10 +375,10 @@ def gossan(red_band, swir1_band):
      for more info please visit:
      # https://www.indexdatabase.de/db/si-single.php?rsindex_id=26=&sensor_id=168
      """
-    return np.where(red_band == 0., 0., swir1_band / red_band)
+    return division(swir1_band, red_band)
 
 
-@require_pd_series
+@array_like
 def gari(blue_band, green_band, red_band, nir_band):
     """ Green Atmospherically Resistan Vegetation Index
     Parameters
@@ -374,7 +395,7 @@ def gari(blue_band, green_band, red_band, nir_band):
     return np.where(denominator == 0, .0, numerator / denominator)
 
 
-@require_pd_series
+@array_like
 def gli(blue_band, green_band, red_band):
     """ Green leaf index
     Parameters
@@ -390,7 +411,7 @@ def gli(blue_band, green_band, red_band):
     return np.where(denominator == 0, .0, numerator / denominator)
 
 
-@require_pd_series
+@array_like
 def gndvi(nir_band, green_band):
     """ Green Normalized Difference Vegetation Index
     Parameters
@@ -403,7 +424,7 @@ def gndvi(nir_band, green_band):
     return normalize_difference_indexes_minus_plus(green_band, nir_band)
 
 
-@require_pd_series
+@array_like
 def gosavi(green_band, nir_band):
     """ Green Optimized Soil Adjusted Vegetation Index
     Parameters
@@ -418,7 +439,7 @@ def gosavi(green_band, nir_band):
     return return_division(numerator, denominator)
 
 
-@require_pd_series
+@array_like
 def gsavi(green_band, nir_band):
     """	Green Soil Adjusted Vegetation Index
     Parameters
@@ -434,7 +455,7 @@ def gsavi(green_band, nir_band):
     return return_division(numerator, denominator)
 
 
-@require_pd_series
+@array_like
 def gbndvi(blue_band, green_band, nir_band):
     """	Green-Blue NDVI
     Parameters
@@ -450,7 +471,7 @@ def gbndvi(blue_band, green_band, nir_band):
     return return_division(numerator, denominator)
 
 
-@require_pd_series
+@array_like
 def grndvi(red_band, green_band, nir_band):
     """		Green-Red NDVI
     Parameters
@@ -466,7 +487,7 @@ def grndvi(red_band, green_band, nir_band):
     return return_division(numerator, denominator)
 
 
-@require_pd_series
+@array_like
 def hue(red_band, green_band, blue_band):
     """	HUE
     Parameters
@@ -480,7 +501,7 @@ def hue(red_band, green_band, blue_band):
     return np.arctan(2 * red_band - green_band - blue_band * 30.5 * (green_band - blue_band))
 
 
-@require_pd_series
+@array_like
 def intensity(red_band, green_band, blue_band):
     """	INTENSITY
     Parameters
@@ -494,7 +515,7 @@ def intensity(red_band, green_band, blue_band):
     return (1 / 30.5) * (red_band + green_band + blue_band)
 
 
-@require_pd_series
+@array_like
 def laterite(swir1_band, swir2_band):
     """	LATERITE
     Parameters
@@ -505,10 +526,10 @@ def laterite(swir1_band, swir2_band):
     for more info please visit:
     # https://www.indexdatabase.de/db/si-single.php?rsindex_id=38=&sensor_id=168
     """
-    return return_division(swir1_band, swir2_band)
+    return division(swir1_band, swir2_band)
 
 
-@require_pd_series
+@array_like
 def logratio(red_band, nir_band):
     """ LOGRATIO
     Parameters
@@ -519,11 +540,11 @@ def logratio(red_band, nir_band):
     for more info please visit:
     # https://www.indexdatabase.de/db/si-single.php?rsindex_id=243=&sensor_id=168
     """
-    division = np.absolute(return_division(nir_band, red_band))
-    return np.where(division == 0., 0., np.log10(division))
+    nir_red_division = np.absolute(division(nir_band, red_band))
+    return np.where(nir_red_division == 0., 0., np.log10(nir_red_division))
 
 
-@require_pd_series
+@array_like
 def mcrig(blue_band, green_band, nir_band):
     """ mCRIG
     Parameters
@@ -538,7 +559,7 @@ def mcrig(blue_band, green_band, nir_band):
     return (blue_band * (-1) - green_band * (-1)) * nir_band
 
 
-@require_pd_series
+@array_like
 def mvi(nir_band, swir1_band):
     """Mid-infrared vegetation index
     Parameters
@@ -552,7 +573,7 @@ def mvi(nir_band, swir1_band):
     return return_division(nir_band, swir1_band)
 
 
-@require_pd_series
+@array_like
 def msrnir_red(red_band, nir_band):
     """	Modified Simple Ratio NIR/RED
     Parameters
@@ -563,13 +584,13 @@ def msrnir_red(red_band, nir_band):
     for more info please visit:
     # https://www.indexdatabase.de/db/si-single.php?rsindex_id=362=&sensor_id=168
     """
-    nir_red_division = return_division(nir_band, red_band)
+    nir_red_division = division(nir_band, red_band)
     numerator = nir_red_division - 1
     denominator = nir_red_division + 1
     return return_division(numerator, denominator)
 
 
-@require_pd_series
+@array_like
 def norm_nir(red_band, green_band, nir_band):
     """ Norm NIR
     Parameters
@@ -585,7 +606,7 @@ def norm_nir(red_band, green_band, nir_band):
     return return_division(nir_band, denominator)
 
 
-@require_pd_series
+@array_like
 def norm_r(red_band, green_band, nir_band):
     """ Norm R
     Parameters
@@ -601,7 +622,7 @@ def norm_r(red_band, green_band, nir_band):
     return return_division(red_band, denominator)
 
 
-@require_pd_series
+@array_like
 def norm_g(red_band, green_band, nir_band):
     """ Norm G
     Parameters
@@ -617,7 +638,7 @@ def norm_g(red_band, green_band, nir_band):
     return return_division(green_band, denominator)
 
 
-@require_pd_series
+@array_like
 def nli(red_band, nir_band):
     """ Norm G
     Parameters
@@ -633,7 +654,7 @@ def nli(red_band, nir_band):
     return return_division(numerator, denominator)
 
 
-@require_pd_series
+@array_like
 def ppr(blue_band, green_band):
     """ Normalized Difference 550/450 Plant pigment ratio
     Parameters
@@ -649,7 +670,7 @@ def ppr(blue_band, green_band):
     return return_division(numerator, denominator)
 
 
-@require_pd_series
+@array_like
 def pvr(red_band, green_band):
     """ Normalized Difference 550/650 Photosynthetic vigour ratio
     Parameters
@@ -665,7 +686,7 @@ def pvr(red_band, green_band):
     return return_division(numerator, denominator)
 
 
-@require_pd_series
+@array_like
 def siwsi(nir_band, swir1_band):
     """ Normalized Difference 860/1640
     Parameters
@@ -676,12 +697,10 @@ def siwsi(nir_band, swir1_band):
     for more info please visit:
     # https://www.indexdatabase.de/db/si-single.php?rsindex_id=219=&sensor_id=168
     """
-    numerator = (nir_band - swir1_band)
-    denominator = nir_band + swir1_band
-    return return_division(numerator, denominator)
+    return normalized_difference(nir_band, swir1_band)
 
 
-@require_pd_series
+@array_like
 def bndvi(blue_band, nir_band):
     """ Normalized Difference NIR/Blue Blue-normalized difference vegetation index
     Parameters
@@ -697,7 +716,7 @@ def bndvi(blue_band, nir_band):
     return return_division(numerator, denominator)
 
 
-@require_pd_series
+@array_like
 def mndvi(nir_band, swir2_band):
     """ Normalized Difference NIR/MIR Modified Normalized Difference Vegetation Index
     Parameters
@@ -713,7 +732,7 @@ def mndvi(nir_band, swir2_band):
     return return_division(numerator, denominator)
 
 
-@require_pd_series
+@array_like
 def ri(red_band, green_band):
     """ Normalized Difference Red/Green Redness Index
     Parameters
@@ -729,7 +748,7 @@ def ri(red_band, green_band):
     return return_division(numerator, denominator)
 
 
-@require_pd_series
+@array_like
 def ndsi(swir1_band, swir2_band):
     """ Normalized Difference Salinity Index
     Parameters
@@ -745,8 +764,8 @@ def ndsi(swir1_band, swir2_band):
     return return_division(numerator, denominator)
 
 
-@require_pd_series
-def ndvic(red_band, nir_band, swir1_band, swir2_band):
+@array_like
+def ndvic(red_band, nir_band, swir1_band, swir2_band, swir1_min=None, swir1_max=None, swir2_min=None):
     """ Normalized Difference Vegetation Index C
     Parameters
     ----------
@@ -754,23 +773,23 @@ def ndvic(red_band, nir_band, swir1_band, swir2_band):
     nir_band: pd.Series indicating the name of the nir band in the dataframe
     swir1_band: pd.Series indicating the name of the swir1 band in the dataframe
     swir2_band: pd.Series indicating the name of the swir2 band in the dataframe
+    swir1_min, swir1_max, swir2_min: statistics of the whole image when the bands are
+        only a part of it, None to take them from the bands
 
     for more info please visit:
     # https://www.indexdatabase.de/db/si-single.php?rsindex_id=377=&sensor_id=168
     """
-    swir1_min = min(swir1_band)
-    swir1_max = max(swir1_band)
-    swir2_min = min(swir2_band)
-    first_multi_numerator = nir_band - red_band
-    first_multi_denominator = nir_band + red_band
-    first_multi = return_division(first_multi_numerator, first_multi_denominator)
+    swir1_min = _statistic(np.min, swir1_band) if swir1_min is None else swir1_min
+    swir1_max = _statistic(np.max, swir1_band) if swir1_max is None else swir1_max
+    swir2_min = _statistic(np.min, swir2_band) if swir2_min is None else swir2_min
+    first_multi = normalized_difference(nir_band, red_band)
     second_multi_numerator = 1 - swir1_band - swir2_min
     second_multi_denominator = swir1_max - swir1_min
     second_multi = return_division(second_multi_numerator, second_multi_denominator)
     return first_multi * second_multi
 
 
-@require_pd_series
+@array_like
 def pndvi(red_band, green_band, blue_band, nir_band):
     """Pan NDVI
     Parameters
@@ -788,7 +807,7 @@ def pndvi(red_band, green_band, blue_band, nir_band):
     return return_division(numerator, denominator)
 
 
-@require_pd_series
+@array_like
 def rbndvi(red_band, blue_band, nir_band):
     """ Red-Blue NDVI
     Parameters
@@ -805,7 +824,7 @@ def rbndvi(red_band, blue_band, nir_band):
     return return_division(numerator, denominator)
 
 
-@require_pd_series
+@array_like
 def if_index(red_band, green_band, blue_band):
     """ Shape Index
     Parameters
@@ -822,7 +841,7 @@ def if_index(red_band, green_band, blue_band):
     return return_division(numerator, denominator)
 
 
-@require_pd_series
+@array_like
 def tm5_tm7(swir1_band, swir2_band):
     """ Simple Ratio 1650/2218
     Parameters
@@ -833,10 +852,10 @@ def tm5_tm7(swir1_band, swir2_band):
     for more info please visit:
     # https://www.indexdatabase.de/db/si-single.php?rsindex_id=337=&sensor_id=168
     """
-    return return_division(swir1_band, swir2_band)
+    return division(swir1_band, swir2_band)
 
 
-@require_pd_series
+@array_like
 def bgi(coastal_band, green_band):
     """ Simple Ratio 1650/2218
     Parameters
@@ -850,7 +869,7 @@ def bgi(coastal_band, green_band):
     return return_division(coastal_band, green_band)
 
 
-@require_pd_series
+@array_like
 def sr550_670(red_band, green_band):
     """ Simple Ratio 550/670
     Parameters
@@ -864,7 +883,7 @@ def sr550_670(red_band, green_band):
     return return_division(green_band, red_band)
 
 
-@require_pd_series
+@array_like
 def sr860_550(green_band, nir_band):
     """ Simple Ratio 860/550
     Parameters
@@ -875,10 +894,10 @@ def sr860_550(green_band, nir_band):
     for more info please visit:
     # https://www.indexdatabase.de/db/si-single.php?rsindex_id=343=&sensor_id=168
     """
-    return return_division(nir_band, green_band)
+    return division(nir_band, green_band)
 
 
-@require_pd_series
+@array_like
 def rdi(nir_band, swir2_band):
     """ Simple Ratio MIR/NIR Ratio Drought Index
     Parameters
@@ -892,7 +911,7 @@ def rdi(nir_band, swir2_band):
     return return_division(swir2_band, nir_band)
 
 
-@require_pd_series
+@array_like
 def srmir_red(red_band, swir2_band):
     """ Simple Ratio MIR/NIR Ratio Drought Index
     Parameters
@@ -906,7 +925,7 @@ def srmir_red(red_band, swir2_band):
     return return_division(swir2_band, red_band)
 
 
-@require_pd_series
+@array_like
 def grvi(green_band, nir_band):
     """ Simple Ratio NIR/G Green Ratio Vegetation Index
     Parameters
@@ -917,10 +936,10 @@ def grvi(green_band, nir_band):
     for more info please visit:
     # https://www.indexdatabase.de/db/si-single.php?rsindex_id=30=&sensor_id=168
     """
-    return return_division(nir_band, green_band)
+    return division(nir_band, green_band)
 
 
-@require_pd_series
+@array_like
 def srnir_mir(nir_band, swir2_band):
     """ Simple Ratio NIR/MIR
     Parameters
@@ -934,7 +953,7 @@ def srnir_mir(nir_band, swir2_band):
     return return_division(nir_band, swir2_band)
 
 
-@require_pd_series
+@array_like
 def dvi(red_band, nir_band):
     """ Simple Ratio NIR/RED Difference Vegetation Index, Vegetation Index Number (VIN)
     Parameters
@@ -945,10 +964,10 @@ def dvi(red_band, nir_band):
     for more info please visit:
     # https://www.indexdatabase.de/db/si-single.php?rsindex_id=479=&sensor_id=168
     """
-    return return_division(nir_band, red_band)
+    return division(nir_band, red_band)
 
 
-@require_pd_series
+@array_like
 def io(red_band, blue_band):
     """ Simple Ratio Red/Blue Iron Oxide
     Parameters
@@ -962,7 +981,7 @@ def io(red_band, blue_band):
     return return_division(red_band, blue_band)
 
 
-@require_pd_series
+@array_like
 def rgr(red_band, green_band):
     """ 	Simple Ratio Red/Green Red-Green Ratio
     Parameters
@@ -976,7 +995,7 @@ def rgr(red_band, green_band):
     return return_division(red_band, green_band)
 
 
-@require_pd_series
+@array_like
 def ssred_nir(red_band, nir_band):
     """ Simple Ratio Red/NIR Ratio Vegetation-Index
     Parameters
@@ -990,7 +1009,7 @@ def ssred_nir(red_band, nir_band):
     return return_division(red_band, nir_band)
 
 
-@require_pd_series
+@array_like
 def swir_1_nir(nir_band, swir1_band):
     """ Simple Ratio SWIRI/NIR Ferrous Minerals
     Parameters
@@ -1004,7 +1023,7 @@ def swir_1_nir(nir_band, swir1_band):
     return return_division(swir1_band, nir_band)
 
 
-@require_pd_series
+@array_like
 def sarvi2(red_band, blue_band, nir_band):
     """ Soil and Atmospherically Resistant Vegetation Index 2
     Parameters
@@ -1016,10 +1035,10 @@ def sarvi2(red_band, blue_band, nir_band):
     for more info please visit:
     # https://www.indexdatabase.de/db/si-single.php?rsindex_id=387=&sensor_id=168
     """
-    return 2.5 * (nir_band - red_band) + (nir_band + (6 * red_band) - (7.5 * blue_band))
+    return 2.5 * difference(nir_band, red_band) + (nir_band + (6 * red_band) - (7.5 * blue_band))
 
 
-@require_pd_series
+@array_like
 def sbl(red_band, nir_band):
     """ 	Soil Background Line
     Parameters
@@ -1033,7 +1052,7 @@ def sbl(red_band, nir_band):
     return nir_band - 2.4 * red_band
 
 
-@require_pd_series
+@array_like
 def sci(nir_band, swir1_band):
     """ Soil Composition Index
     Parameters
@@ -1044,12 +1063,10 @@ def sci(nir_band, swir1_band):
     for more info please visit:
     # https://www.indexdatabase.de/db/si-single.php?rsindex_id=88=&sensor_id=168
     """
-    numerator = swir1_band - nir_band
-    denominator = swir1_band + nir_band
-    return return_division(numerator, denominator)
+    return normalized_difference(swir1_band, nir_band)
 
 
-@require_pd_series
+@array_like
 def slavi(red_band, nir_band, swir2_band):
     """ Specific Leaf Area Vegetation Index
     Parameters
@@ -1065,7 +1082,7 @@ def slavi(red_band, nir_band, swir2_band):
     return return_division(nir_band, denominator)
 
 
-@require_pd_series
+@array_like
 def sqrt_nir_ir(red_band, nir_band):
     """ 	SQRT(IR/R)
     Parameters
@@ -1076,10 +1093,10 @@ def sqrt_nir_ir(red_band, nir_band):
     for more info please visit:
     # https://www.indexdatabase.de/db/si-single.php?rsindex_id=200=&sensor_id=168
     """
-    return np.sqrt(np.absolute(return_division(nir_band, red_band)))
+    return np.sqrt(np.absolute(division(nir_band, red_band)))
 
 
-@require_pd_series
+@array_like
 def tass_brig(red_band, blue_band, green_band, nir_band, swir2_band):
     """ Tasselled Cap - brightness
     Parameters
@@ -1096,7 +1113,7 @@ def tass_brig(red_band, blue_band, green_band, nir_band, swir2_band):
     return 0.3037 * blue_band + 0.2793 * green_band + 0.4773 * red_band + 0.5585 * nir_band + 0.1863 * swir2_band
 
 
-@require_pd_series
+@array_like
 def tass_veg(red_band, blue_band, green_band, nir_band, swir1_band, swir2_band):
     """ Tasselled Cap - vegetation
     Parameters
@@ -1115,7 +1132,7 @@ def tass_veg(red_band, blue_band, green_band, nir_band, swir1_band, swir2_band):
            .7243 * nir_band + .084 * swir1_band - 0.18 * swir2_band
 
 
-@require_pd_series
+@array_like
 def tass_wet(red_band, blue_band, green_band, nir_band, swir1_band, swir2_band):
     """ Tasselled Cap - wetness
     Parameters
@@ -1134,7 +1151,7 @@ def tass_wet(red_band, blue_band, green_band, nir_band, swir1_band, swir2_band):
            .3406 * nir_band - .7112 * swir1_band - .4272 * swir2_band
 
 
-@require_pd_series
+@array_like
 def t_ndvi(red_band, nir_band):
     """ Transformed NDVI
     Parameters
@@ -1145,12 +1162,10 @@ def t_ndvi(red_band, nir_band):
     for more info please visit:
     # https://www.indexdatabase.de/db/si-single.php?rsindex_id=202=&sensor_id=168
     """
-    numerator = nir_band - red_band
-    denominator = nir_band + red_band + 0.5
-    return return_division(numerator, denominator)
+    return return_division(difference(nir_band, red_band), addition(nir_band, red_band) + 0.5)
 
 
-@require_pd_series
+@array_like
 def tvi(red_band, green_band):
     """ Transformed Vegetation Index
     Parameters
@@ -1166,7 +1181,7 @@ def tvi(red_band, green_band):
     return return_division(numerator, denominator) + 0.5
 
 
-@require_pd_series
+@array_like
 def varigreen(red_band, green_band, blue_band):
     """ Visible Atmospherically Resistant Index Green
     Parameters
@@ -1183,7 +1198,7 @@ def varigreen(red_band, green_band, blue_band):
     return return_division(numerator, denominator)
 
 
-@require_pd_series
+@array_like
 def wdrvi(red_band, nir_band):
     """ Wide Dynamic Range Vegetation Index
     Parameters
@@ -1194,12 +1209,12 @@ def wdrvi(red_band, nir_band):
     for more info please visit:
     # https://www.indexdatabase.de/db/si-single.php?rsindex_id=125=&sensor_id=168
     """
-    numerator = .1 * (nir_band - red_band)
-    denominator = .1 * (nir_band + red_band)
+    numerator = .1 * difference(nir_band, red_band)
+    denominator = .1 * addition(nir_band, red_band)
     return return_division(numerator, denominator)
 
 
-@require_pd_series
+@array_like
 def ndbi(nir_band, swir1_band):
     """ Normalized Difference Built-up Index
     Parameters
@@ -1210,12 +1225,10 @@ def ndbi(nir_band, swir1_band):
     for more info please visit:
     # https://www.linkedin.com/pulse/ndvi-ndbi-ndwi-calculation-using-landsat-7-8-tek-bahadur-kshetri
     """
-    numerator = swir1_band - nir_band
-    denominator = swir1_band + nir_band
-    return return_division(numerator, denominator)
+    return normalized_difference(swir1_band, nir_band)
 
 
-@require_pd_series
+@array_like
 def bu(red_band, nir_band, swir1_band):
     """ Normalized Difference Built-up Index
     Parameters
@@ -1227,16 +1240,12 @@ def bu(red_band, nir_band, swir1_band):
     for more info please visit:
     # https://www.linkedin.com/pulse/ndvi-ndbi-ndwi-calculation-using-landsat-7-8-tek-bahadur-kshetri
     """
-    ndvi_num = nir_band - red_band
-    ndvi_dem = nir_band + red_band
-    ndbi_num = swir1_band - nir_band
-    ndbi_dem = swir1_band + nir_band
-    ndvi = return_division(ndvi_num, ndvi_dem)
-    nbdi = return_division(ndbi_num, ndbi_dem)
+    ndvi = normalized_difference(nir_band, red_band)
+    nbdi = normalized_difference(swir1_band, nir_band)
     return nbdi - ndvi
 
 
-@require_pd_series
+@array_like
 def mndwi(green_band, swir1_band):
     """ Normalized Difference Built-up Index
     Parameters
@@ -1 +1,2 @@
 from .CommonIndex import normalize_difference_indexes_minus_plus, CommonIndex
+from .subexpressions import release_terms, shared_subexpressions, term_uses
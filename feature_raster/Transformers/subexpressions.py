@@ -0,0 +1,124 @@
+import collections
+import contextlib
+import contextvars
+
+import numpy as np
+
+_shared_terms = contextvars.ContextVar("shared_terms", default=None)
+
+
+class _SharedTerms:
+    """terms of a shared_subexpressions block. Each term has a symbol, its name and the
+    symbols of its arrays, when the arrays are named arrays or other terms, the symbol
+    of a named array is its name. counts has how many consumers used each symbol and
+    uses how many will use it"""
+
+    def __init__(self, names, uses):
+        self.terms = {}
+        self.symbols = {_identity(array): name for name, array in (names or {}).items()}
+        self.uses = uses
+        self.counts = collections.Counter()
+        self.used = set()
+
+
+@contextlib.contextmanager
+def shared_subexpressions(names=None, uses=None):
+    """Inside the block the terms shared by many indexes, like nir - red, nir + red or
+    nir / red, are computed once for the same arrays and reused by every index that
+    needs them. They are freed when the block ends. The reused arrays are the same
+    objects, so the indexes returned inside the block must not be modified in place.
+
+    Parameters
+    ----------
+    names: {name: array} dict of the arrays the indexes take, e.g. the columns of the bands
+    uses: how many consumers use each term, see term_uses. With names and uses each
+        term is freed by release_terms after its last consumer instead of at the end
+    """
+    token = _shared_terms.set(_SharedTerms(names, uses))
+    try:
+        yield
+    finally:
+        _shared_terms.reset(token)
+
+
+def release_terms():
+    """Ends the current consumer of the terms, e.g. an index, freeing the terms it was
+    the last consumer of"""
+    shared = _shared_terms.get()
+    if shared is None:
+        return
+    used, shared.used = shared.used, set()
+    shared.counts.update(used)
+    if shared.uses is None:
+        return
+    for key, (_, result, symbol) in list(shared.terms.items()):
+        if symbol in used and shared.counts[symbol] >= shared.uses.get(symbol, 0):
+            del shared.terms[key]
+            del shared.symbols[_identity(result)]
+
+
+def term_uses(consumers, names):
+    """{symbol: number of consumers that use the term} of consumers, functions called
+    without arguments that take the arrays of names, for shared_subexpressions. Called
+    with arrays of a single element the consumers are cheap to trace"""
+    with shared_subexpressions(names):
+        shared = _shared_terms.get()
+        with np.errstate(all="ignore"):
+            for consumer in consumers:
+                consumer()
+                release_terms()
+        return dict(shared.counts)
+
+
+def _identity(array):
+    """arrays that are views of the same memory, like the values of a Series taken twice,
+    are the same array"""
+    interface = getattr(array, "__array_interface__", None)
+    if interface is None:
+        return id(array)
+    return interface["data"][0], interface["shape"], interface["strides"], interface["typestr"]
+
+
+def shared_term(name, function, *arrays, commutative=False):
+    """Returns function(*arrays), reusing the result of a previous call with the same name
+    and arrays when it is called inside shared_subexpressions"""
+    shared = _shared_terms.get()
+    if shared is None:
+        return function(*arrays)
+    identities = [_identity(array) for array in arrays]
+    key = (name,) + tuple(sorted(identities, key=repr) if commutative else identities)
+    if key not in shared.terms:
+        # the arrays are kept alive with the result so their memory can not be reused
+        result = function(*arrays)
+        symbols = [shared.symbols.get(identity) for identity in identities]
+        symbol = None
+        if all(symbol is not None for symbol in symbols):
+            symbol = (name,) + tuple(sorted(symbols, key=repr) if commutative else symbols)
+            shared.symbols[_identity(result)] = symbol
+        shared.terms[key] = (arrays, result, symbol)
+    symbol = shared.terms[key][2]
+    if symbol is not None:
+        shared.used.add(symbol)
+    return shared.terms[key][1]
+
+
+def _division(numerator, denominator):
+    return np.where(denominator == 0., 0., numerator / denominator)
+
+
+def difference(minuend, subtrahend):
+    return shared_term("difference", np.subtract, minuend, subtrahend)
+
+
+def addition(band_1, band_2):
+    return shared_term("addition", np.add, band_1, band_2, commutative=True)
+
+
+def division(numerator, denominator):
+    """numerator / denominator, 0 where the denominator is 0"""
+    return shared_term("division", _division, numerator, denominator)
+
+
+def normalized_difference(band_1, band_2):
+    """(band_1 - band_2) / (band_1 + band_2), 0 where the denominator is 0"""
+    return division(difference(band_1, band_2), addition(band_1, band_2))
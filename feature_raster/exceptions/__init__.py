@@ -1 +1 @@
-from .some_exceptions import NoCobertureSeries, InvalidImage, InvalidTypeOfGeom
+from .some_exceptions import NoCobertureSeries, InvalidImage, InvalidTypeOfGeom, InvalidIndex, InvalidBand
@@ -7,4 +7,12 @@ class InvalidTypeOfGeom(Exception):
 
 
 class NoCobertureSeries(Exception):
-    pass
\ No newline at end of file
+    pass
+
+
+class InvalidIndex(Exception):
+    pass
+
+
+class InvalidBand(Exception):
+    pass
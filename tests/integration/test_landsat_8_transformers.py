@@ -1,12 +1,30 @@
+import os
+import tempfile
 import unittest
+from unittest import mock
+import geopandas as gpd
 import numpy as np
+import rasterio
+from shapely.geometry import box
 
-from feature_raster.exceptions.some_exceptions import InvalidImage
+from feature_raster.exceptions.some_exceptions import InvalidImage, InvalidIndex
 from feature_raster.project_enums.LandsatEnums import LandsatEnums
 from feature_raster.Sensors.Landsat import Landsat8
 from feature_raster.Transformers.Landsat import Landsat8Transformer
 from tests.paths import small_2018_dataset
 
+try:
+    import numexpr
+    numexpr_installed = True
+except ImportError:
+    numexpr_installed = False
+
+try:
+    import numba
+    numba_installed = True
+except ImportError:
+    numba_installed = False
+
 # TODO try to create a mock of the dataframe of a Landsat8 and make some of the indexes of that dataframe
 #  zeros, with that then create the tests necesary no detect where some denominators may be 0 an return and
 #  np.inf when a new index is created
@@ -23,7 +41,7 @@ class Landsat8ExceptionsTest(unittest.TestCase):
 class Landsat8CorrectTransformsTest(unittest.TestCase):
     def setUp(self):
         self.landsat8 = Landsat8(small_2018_dataset)
-        self.transformer = Landsat8Transformer()
+        self.transformer = Landsat8Transformer(dtype="float64")
         self.transformation = self.transformer.transform(self.landsat8)
 
     def check_series_equal_expected(self, series_name, array):
@@ -443,3 +461,195 @@ class Landsat8CorrectTransformsTest(unittest.TestCase):
 
 
 
+
+
+class Landsat8StreamingTransformTest(unittest.TestCase):
+    def setUp(self):
+        self.landsat8 = Landsat8(small_2018_dataset, lazy=True)
+        self.transformer = Landsat8Transformer()
+        self.directory = tempfile.TemporaryDirectory()
+        self.name = os.path.join(self.directory.name, "features.tif")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_windowed_raster_equals_the_whole_transformation(self):
+        self.transformer.transform_to_raster(self.landsat8, self.name, window_size=(4, 3))
+        expected = self.transformer.transform(self.landsat8)
+        with rasterio.open(self.name) as dataset:
+            self.assertEqual(len(expected.columns), dataset.count)
+            self.assertEqual(("float32",) * dataset.count, dataset.dtypes)
+            written = dataset.read()
+        for index, column in enumerate(expected.columns):
+            self.assertTrue(np.allclose(expected[column].to_numpy(), written[index].flatten()), column)
+
+
+    def test_default_windows_are_rows_of_blocks_of_the_output(self):
+        with mock.patch.object(self.landsat8, "iter_windows", wraps=self.landsat8.iter_windows) as iter_windows:
+            self.transformer.transform_to_raster(self.landsat8, self.name, blocksize=16)
+        iter_windows.assert_called_once_with((16, self.landsat8.meta["width"]))
+        with rasterio.open(self.name) as dataset:
+            self.assertEqual((16, 16), dataset.block_shapes[0])
+            written = dataset.read()
+        expected = self.transformer.transform(self.landsat8)
+        self.assertTrue(np.allclose(expected.to_numpy().T, written.reshape((len(expected.columns), -1))))
+
+    def test_image_statistics_are_read_without_loading_the_image(self):
+        statistics = self.transformer.image_statistics(self.landsat8, window_size=(4, 3))
+        self.assertFalse(self.landsat8.is_loaded)
+        dataframe = Landsat8(small_2018_dataset).dataframe
+        self.assertEqual([LandsatEnums.swir1.value, LandsatEnums.swir2.value], list(statistics))
+        for band, (minimum, maximum) in statistics.items():
+            self.assertEqual((dataframe[band].min(), dataframe[band].max()), (minimum, maximum))
+
+
+class Landsat8ValidOnlyStreamingTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.image = os.path.join(self.directory.name, "image.tif")
+        count = len(Landsat8.band_names)
+        stack = np.random.RandomState(0).randint(1, 1000, (count, 64, 64)).astype("uint16")
+        # the first window of 16x16 pixels is only nodata, like the corners of a scene
+        stack[:, :16, :16] = 0
+        with rasterio.open(self.image, "w", driver="GTiff", width=64, height=64, count=count, dtype="uint16",
+                           nodata=0, crs="EPSG:32618",
+                           transform=rasterio.transform.from_origin(0, 640, 10, 10)) as dataset:
+            dataset.write(stack)
+        self.name = os.path.join(self.directory.name, "features.tif")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_windows_without_valid_pixels_are_written_as_nodata(self):
+        landsat8 = Landsat8(self.image, valid_only=True, lazy=True)
+        transformer = Landsat8Transformer()
+        transformer.transform_to_raster(landsat8, self.name, window_size=16)
+        expected = transformer.transform(landsat8)
+        with rasterio.open(self.name) as dataset:
+            written = dataset.read()
+        self.assertTrue(np.isnan(written[:, :16, :16]).all())
+        rows, cols = landsat8.rows_cols()
+        for index, column in enumerate(expected.columns):
+            self.assertTrue(np.allclose(expected[column].to_numpy(), written[index, rows, cols]), column)
+
+    def test_dataframe_without_pixels(self):
+        dataframe = Landsat8(self.image, valid_only=True).dataframe.iloc[:0]
+        for engine in ["numpy", "numexpr"] if numexpr_installed else ["numpy"]:
+            transformation = Landsat8Transformer(engine=engine).transform_dataframe(dataframe)
+            self.assertEqual(0, len(transformation))
+
+
+class Landsat8SelectedIndicesTest(unittest.TestCase):
+    def setUp(self):
+        self.landsat8 = Landsat8(small_2018_dataset)
+
+    def test_only_the_requested_indices_are_returned(self):
+        transformation = Landsat8Transformer(indices=[LandsatEnums.ctvi.value, LandsatEnums.gndvi]) \
+            .transform(self.landsat8)
+        expected = list(Landsat8.band_names) + [LandsatEnums.ctvi.value, LandsatEnums.gndvi.value]
+        self.assertEqual(expected, transformation.columns.tolist())
+        full = Landsat8Transformer().transform(self.landsat8)
+        self.assertTrue(np.allclose(full[LandsatEnums.ctvi.value], transformation[LandsatEnums.ctvi.value]))
+
+    def test_transformation_is_a_single_float_block(self):
+        transformation = Landsat8Transformer().transform(self.landsat8)
+        self.assertTrue((transformation.dtypes == np.float32).all())
+        self.assertTrue(np.shares_memory(transformation.to_numpy(), transformation.to_numpy()))
+
+    def test_float32_is_close_to_float64(self):
+        transformation = Landsat8Transformer().transform(self.landsat8)
+        expected = Landsat8Transformer(dtype="float64").transform(self.landsat8)
+        self.assertTrue((expected.dtypes == np.float64).all())
+        for column in expected.columns:
+            # the tasseled caps subtract terms in the thousands, float32 keeps ~7 digits of them
+            self.assertTrue(np.allclose(expected[column], transformation[column], rtol=1e-5, atol=1e-2), column)
+
+    def test_dtype_must_be_a_float(self):
+        with self.assertRaises(ValueError):
+            Landsat8Transformer(dtype="int16").transform(self.landsat8)
+
+    def test_unknown_index(self):
+        with self.assertRaises(InvalidIndex):
+            Landsat8Transformer(indices=["NOT_AN_INDEX"]).transform(self.landsat8)
+
+    def test_only_the_required_bands_are_read(self):
+        transformer = Landsat8Transformer(indices=[LandsatEnums.ctvi.value])
+        self.assertEqual([LandsatEnums.red.value, LandsatEnums.nir.value], transformer.required_bands())
+        transformation = transformer.transform(Landsat8(small_2018_dataset, bands=transformer.required_bands()))
+        self.assertEqual([LandsatEnums.red.value, LandsatEnums.nir.value, LandsatEnums.ctvi.value],
+                         transformation.columns.tolist())
+        full = transformer.transform(self.landsat8)
+        self.assertTrue(np.array_equal(full[LandsatEnums.ctvi.value], transformation[LandsatEnums.ctvi.value]))
+
+    def test_missing_bands(self):
+        with self.assertRaises(InvalidImage):
+            Landsat8Transformer(indices=[LandsatEnums.gndvi.value]).transform(
+                Landsat8(small_2018_dataset, bands=[LandsatEnums.nir.value]))
+
+
+class Landsat8TrainingSetTest(unittest.TestCase):
+    def setUp(self):
+        self.landsat8 = Landsat8(small_2018_dataset)
+        left, top, res = self.landsat8.bounds["left"], self.landsat8.bounds["top"], self.landsat8.res
+        polygons = [box(left, top - 3 * res, left + 4 * res, top),
+                    box(left + 6 * res, top - 8 * res, left + 8 * res, top - 6 * res)]
+        self.cobertures = gpd.GeoDataFrame({"coberture": ["forest", "water"]}, geometry=polygons,
+                                           crs=self.landsat8.crs)
+        self.transformer = Landsat8Transformer()
+
+    def test_training_set_equals_the_labelled_rows_of_the_whole_image(self):
+        transformation = self.transformer.transform(self.landsat8)
+        self.landsat8.dataframe = transformation
+        self.landsat8.coberture_to_pandas(self.cobertures, categorical=True)
+        expected = self.landsat8.select_df_of_cobertures()
+        lazy = Landsat8(small_2018_dataset, lazy=True)
+        training = self.transformer.training_set(lazy, self.cobertures, categorical=True, window_size=(4, 3))
+        self.assertFalse(lazy.is_loaded)
+        self.assertTrue(expected.sort_index().equals(training.sort_index()))
+
+    def test_cobertures_are_carried_through_the_transformation(self):
+        self.landsat8.coberture_to_pandas(self.cobertures, categorical=True)
+        cobertures = self.landsat8.dataframe["COBERTURE"]
+        transformation = self.transformer.transform(self.landsat8)
+        self.assertEqual(list(Landsat8.band_names) + ["COBERTURE"],
+                         transformation.columns[:len(Landsat8.band_names) + 1].tolist())
+        self.assertTrue(cobertures.equals(transformation["COBERTURE"]))
+        self.cobertures["coberture"] = [3, 7]
+        self.landsat8.coberture_to_pandas(self.cobertures)
+        transformation = self.transformer.transform(self.landsat8)
+        self.assertTrue(self.landsat8.dataframe["COBERTURE"].equals(transformation["COBERTURE"]))
+        self.assertEqual(np.float32, transformation[LandsatEnums.ndvi.value].dtype)
+
+    def test_cobertures_outside_the_image_give_an_empty_training_set(self):
+        self.cobertures.geometry = self.cobertures.geometry.translate(xoff=1000 * self.landsat8.res)
+        training = self.transformer.training_set(self.landsat8, self.cobertures, categorical=True)
+        self.assertEqual(0, len(training))
+        self.assertIn("COBERTURE", training.columns)
+
+
+@unittest.skipUnless(numexpr_installed, "numexpr is not installed")
+class Landsat8NumexprEngineTest(unittest.TestCase):
+    def test_numexpr_engine_equals_numpy_engine(self):
+        landsat8 = Landsat8(small_2018_dataset)
+        expected = Landsat8Transformer(dtype="float64").transform(landsat8)
+        transformation = Landsat8Transformer(engine="numexpr", dtype="float64").transform(landsat8)
+        self.assertEqual(expected.columns.tolist(), transformation.columns.tolist())
+        for column in expected.columns:
+            self.assertTrue(np.allclose(expected[column], transformation[column]), column)
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            Landsat8Transformer(engine="fortran").transform(Landsat8(small_2018_dataset))
+
+
+@unittest.skipUnless(numba_installed, "numba is not installed")
+class Landsat8NumbaEngineTest(unittest.TestCase):
+    def test_numba_engine_equals_numpy_engine(self):
+        landsat8 = Landsat8(small_2018_dataset)
+        indices = [LandsatEnums.ctvi.value, LandsatEnums.ndvic.value, LandsatEnums.logratio.value,
+                   LandsatEnums.gemi.value, LandsatEnums.hue.value, LandsatEnums.bgi.value]
+        expected = Landsat8Transformer(indices=indices, dtype="float64").transform(landsat8)
+        transformation = Landsat8Transformer(indices=indices, engine="numba", dtype="float64").transform(landsat8)
+        self.assertEqual(expected.columns.tolist(), transformation.columns.tolist())
+        for column in expected.columns:
+            self.assertTrue(np.allclose(expected[column], transformation[column]), column)
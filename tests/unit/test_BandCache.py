@@ -0,0 +1,59 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from feature_raster.Sensors import BandCache
+from feature_raster.Sensors.Landsat import Landsat8
+from feature_raster.project_enums import LandsatEnums
+from tests.paths import small_2018_dataset
+
+
+class BandCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = BandCache(os.path.join(self.directory.name, "cache"), max_bytes=3000)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def cached_files(self):
+        return sorted(name for name in os.listdir(self.cache.directory) if name.endswith(".npy"))
+
+    def test_second_sensor_maps_the_cache(self):
+        expected = Landsat8(small_2018_dataset).dataframe
+        first = Landsat8(small_2018_dataset, cache=self.cache)
+        self.assertEqual(1, len(self.cached_files()))
+        second = Landsat8(small_2018_dataset, cache=self.cache.directory)
+        self.assertEqual(1, len(self.cached_files()))
+        for landsat8 in [first, second]:
+            self.assertTrue(expected.equals(landsat8.dataframe))
+        stack = self.cache.get(self.cached_files()[0][:-len(".npy")])
+        self.assertIsInstance(stack, np.memmap)
+
+    def test_bands_and_modifications_are_other_keys(self):
+        image = os.path.join(self.directory.name, "image.tif")
+        shutil.copy(small_2018_dataset, image)
+        Landsat8(image, cache=self.cache)
+        Landsat8(image, cache=self.cache, bands=[LandsatEnums.red.value])
+        self.assertEqual(2, len(self.cached_files()))
+        os.utime(image, ns=(0, 0))
+        Landsat8(image, cache=self.cache, bands=[LandsatEnums.red.value])
+        self.assertEqual(3, len(self.cached_files()))
+
+    def test_least_recently_used_are_evicted(self):
+        # each file takes 928 bytes, 800 of data and the header
+        self.cache.max_bytes = 2000
+        stacks = {str(key): np.full((10, 10), key, dtype=np.float64) for key in range(4)}
+        for key in ["0", "1"]:
+            self.cache.put(key, stacks[key])
+            os.utime(self.cache._path(key), ns=(int(key), int(key)))
+        self.cache.get("0")
+        self.cache.put("2", stacks["2"])
+        self.assertEqual(["0.npy", "2.npy"], self.cached_files())
+        self.assertTrue(np.array_equal(stacks["2"], self.cache.get("2")))
+
+    def test_stacks_bigger_than_the_cache_are_not_cached(self):
+        stack = np.zeros((100, 100))
+        self.assertIs(stack, self.cache.put("big", stack))
+        self.assertEqual([], self.cached_files())
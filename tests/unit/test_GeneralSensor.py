@@ -1,7 +1,17 @@
+import os
+import tempfile
 import unittest
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import rasterio
+from rasterio import features
+from shapely.geometry import box
 from feature_raster.Sensors.Landsat import Landsat8
 from tests.paths import small_2018_dataset
 from feature_raster.exceptions import NoCobertureSeries
+from feature_raster.Sensors.GeneralSensor import GeneralSensor
+from rasterio.windows import Window
 
 
 class GeneralSensorInstancesTest(unittest.TestCase):
@@ -22,3 +32,360 @@ class GeneralSensorInstancesTest(unittest.TestCase):
         with self.assertRaises(TypeError):
             self.landsat8.dataframe = some_random_variable
             self.landsat8.dataframe = another_random_variable
+
+
+class GeneralSensorLazyTest(unittest.TestCase):
+    def setUp(self):
+        self.landsat8 = Landsat8(small_2018_dataset, lazy=True)
+
+    def test_lazy_sensor_only_reads_metadata(self):
+        self.assertFalse(self.landsat8.is_loaded)
+        self.assertEqual(10, self.landsat8.meta["width"])
+        self.assertEqual(30., self.landsat8.res)
+
+    def test_dataframe_is_read_on_first_access(self):
+        dataframe = self.landsat8.dataframe
+        self.assertTrue(self.landsat8.is_loaded)
+        self.assertEqual(list(Landsat8.band_names), dataframe.columns.tolist())
+        self.assertEqual(90, len(dataframe))
+
+    def test_release_frees_the_pixels(self):
+        self.landsat8.load()
+        self.landsat8.release()
+        self.assertFalse(self.landsat8.is_loaded)
+        self.assertEqual(90, len(self.landsat8.dataframe))
+
+
+class GeneralSensorWindowsTest(unittest.TestCase):
+    def setUp(self):
+        self.landsat8 = Landsat8(small_2018_dataset, lazy=True)
+
+    def test_block_windows_cover_the_image(self):
+        windows = list(self.landsat8.iter_windows())
+        self.assertEqual(90, sum(len(dataframe) for _, dataframe in windows))
+
+    def test_tile_grid_keeps_offsets_and_band_names(self):
+        full = self.landsat8.dataframe.to_numpy().reshape((9, 10, -1))
+        windows = list(self.landsat8.iter_windows(window_size=(4, 3)))
+        self.assertEqual(12, len(windows))
+        for window, dataframe in windows:
+            self.assertEqual(list(Landsat8.band_names), dataframe.columns.tolist())
+            expected = full[window.row_off:window.row_off + window.height,
+                            window.col_off:window.col_off + window.width].reshape((-1, len(Landsat8.band_names)))
+            self.assertTrue(np.array_equal(expected, dataframe.to_numpy()))
+
+
+class GeneralSensorToRasterTest(unittest.TestCase):
+    def setUp(self):
+        self.landsat8 = Landsat8(small_2018_dataset)
+        self.directory = tempfile.TemporaryDirectory()
+        self.name = os.path.join(self.directory.name, "bands.tif")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_uint16_bands_are_written_as_float32(self):
+        self.landsat8.dataframe_to_raster(self.name)
+        with rasterio.open(self.name) as dataset:
+            self.assertEqual(("float32",) * 8, dataset.dtypes)
+            written = dataset.read()
+        self.assertTrue(np.array_equal(self.landsat8.dataframe.to_numpy().T, written.reshape((8, -1))))
+
+    def test_dtype_can_be_given(self):
+        self.landsat8.dataframe_to_raster(self.name, dtype="float64")
+        with rasterio.open(self.name) as dataset:
+            self.assertEqual(("float64",) * 8, dataset.dtypes)
+
+    def test_tiled_and_compressed(self):
+        self.landsat8.dataframe_to_raster(self.name, blocksize=16)
+        with rasterio.open(self.name) as dataset:
+            self.assertTrue(dataset.profile["tiled"])
+            self.assertEqual((16, 16), dataset.block_shapes[0])
+            self.assertEqual("deflate", dataset.compression.value.lower())
+            written = dataset.read()
+        self.assertTrue(np.array_equal(self.landsat8.dataframe.to_numpy().T, written.reshape((8, -1))))
+
+    def test_uncompressed(self):
+        self.landsat8.dataframe_to_raster(self.name, compress=None)
+        with rasterio.open(self.name) as dataset:
+            self.assertIsNone(dataset.compression)
+
+    def test_compressed_rasters_can_be_bigtiff(self):
+        options = GeneralSensor._gtiff_options("float32", 256, "deflate", None, "ALL_CPUS")
+        self.assertEqual("IF_SAFER", options["bigtiff"])
+        self.landsat8.dataframe_to_raster(self.name, bigtiff="YES")
+        with open(self.name, "rb") as f:
+            # the version of a BigTIFF is 43 instead of the 42 of a classic TIFF
+            self.assertEqual(43, int.from_bytes(f.read(4)[2:], "little"))
+
+    def test_blocksize_must_be_a_multiple_of_16(self):
+        with self.assertRaises(ValueError):
+            self.landsat8.dataframe_to_raster(self.name, blocksize=100)
+
+    def test_windows_are_split_by_the_blocks_of_the_output(self):
+        parts = list(GeneralSensor._split_by_blocks(Window(10, 20, 30, 20), (16, 16)))
+        self.assertEqual([Window(10, 20, 6, 12), Window(16, 20, 16, 12), Window(32, 20, 8, 12),
+                          Window(10, 32, 6, 8), Window(16, 32, 16, 8), Window(32, 32, 8, 8)],
+                         [part for part, _ in parts])
+        self.assertEqual((slice(12, 20), slice(22, 30)), parts[-1][1])
+
+
+class GeneralSensorToCogTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        image = os.path.join(self.directory.name, "image.tif")
+        with rasterio.open(image, "w", driver="GTiff", width=64, height=64, count=2, dtype="uint16",
+                           crs="EPSG:32614", transform=rasterio.transform.from_origin(0, 640, 10, 10)) as dataset:
+            dataset.write(np.arange(2 * 64 * 64, dtype="uint16").reshape((2, 64, 64)))
+        self.sensor = GeneralSensor(image)
+        self.name = os.path.join(self.directory.name, "bands.tif")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_cog_has_overviews_and_band_descriptions(self):
+        self.sensor.dataframe_to_raster(self.name, driver="COG", blocksize=16)
+        with rasterio.open(self.name) as dataset:
+            self.assertEqual("COG", dataset.tags(ns="IMAGE_STRUCTURE")["LAYOUT"])
+            self.assertEqual((16, 16), dataset.block_shapes[0])
+            self.assertEqual([2, 4], dataset.overviews(1))
+            self.assertEqual(("BAND_1", "BAND_2"), dataset.descriptions)
+            written = dataset.read()
+        self.assertTrue(np.array_equal(self.sensor.dataframe.to_numpy().T, written.reshape((2, -1))))
+        self.assertEqual(["bands.tif", "image.tif"], sorted(os.listdir(self.directory.name)))
+
+    def test_cog_can_be_bigtiff(self):
+        self.sensor.dataframe_to_raster(self.name, driver="COG", blocksize=16, bigtiff="YES")
+        with open(self.name, "rb") as f:
+            self.assertEqual(43, int.from_bytes(f.read(4)[2:], "little"))
+
+
+class GeneralSensorThreadsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.image = os.path.join(self.directory.name, "image.tif")
+        with rasterio.open(self.image, "w", driver="GTiff", width=40, height=64, count=3, dtype="uint16",
+                           tiled=True, blockxsize=16, blockysize=16, compress="deflate", crs="EPSG:32614",
+                           transform=rasterio.transform.from_origin(0, 640, 10, 10)) as dataset:
+            dataset.write(np.arange(3 * 64 * 40, dtype="uint16").reshape((3, 64, 40)))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_threads_read_the_same_pixels(self):
+        expected = GeneralSensor(self.image).dataframe
+        for n_threads in [2, 3, 8]:
+            dataframe = GeneralSensor(self.image, n_threads=n_threads).dataframe
+            self.assertEqual(expected.columns.tolist(), dataframe.columns.tolist())
+            self.assertTrue(np.array_equal(expected.to_numpy(), dataframe.to_numpy()), n_threads)
+
+
+class GeneralSensorValidOnlyTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.image = os.path.join(self.directory.name, "image.tif")
+        self.stack = np.arange(1, 2 * 20 * 30 + 1, dtype="uint16").reshape((2, 20, 30))
+        # a footprint with nodata around it, and a pixel that is only nodata in the second band
+        self.stack[:, :5] = 0
+        self.stack[:, :, 25:] = 0
+        self.stack[1, 10, 10] = 0
+        with rasterio.open(self.image, "w", driver="GTiff", width=30, height=20, count=2, dtype="uint16",
+                           nodata=0, crs="EPSG:32614",
+                           transform=rasterio.transform.from_origin(0, 200, 10, 10)) as dataset:
+            dataset.write(self.stack)
+        self.valid = (self.stack != 0).all(axis=0)
+        self.name = os.path.join(self.directory.name, "bands.tif")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_only_the_valid_pixels_are_kept(self):
+        sensor = GeneralSensor(self.image, valid_only=True)
+        self.assertEqual(self.valid.sum(), len(sensor.dataframe))
+        self.assertTrue(np.array_equal(np.flatnonzero(self.valid), sensor.dataframe.index.to_numpy()))
+        rows, cols = sensor.rows_cols()
+        self.assertTrue(np.array_equal(self.stack[0, rows, cols], sensor.dataframe["BAND_1"].to_numpy()))
+
+    def test_windows_have_the_positions_in_the_image(self):
+        sensor = GeneralSensor(self.image, valid_only=True)
+        windows = [dataframe for _, dataframe in sensor.iter_windows(window_size=(7, 8))]
+        self.assertTrue(sensor.dataframe.equals(pd.concat(windows).sort_index()))
+
+    def test_raster_is_filled_with_nodata(self):
+        sensor = GeneralSensor(self.image, valid_only=True)
+        sensor.dataframe_to_raster(self.name)
+        with rasterio.open(self.name) as dataset:
+            self.assertTrue(np.isnan(dataset.nodata))
+            written = dataset.read()
+        self.assertTrue(np.isnan(written[:, ~self.valid]).all())
+        self.assertTrue(np.array_equal(self.stack[:, self.valid], written[:, self.valid]))
+
+
+class GeneralSensorDecimationTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.image = os.path.join(self.directory.name, "image.tif")
+        self.stack = np.arange(2 * 40 * 30, dtype="uint16").reshape((2, 40, 30))
+        self.transform = rasterio.transform.from_origin(1000, 2000, 10, 10)
+        with rasterio.open(self.image, "w", driver="GTiff", width=30, height=40, count=2, dtype="uint16",
+                           crs="EPSG:32614", transform=self.transform) as dataset:
+            dataset.write(self.stack)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_meta_is_the_one_of_the_smaller_image(self):
+        sensor = GeneralSensor(self.image, decimation=4)
+        self.assertEqual((10, 8), (sensor.meta["height"], sensor.meta["width"]))
+        self.assertEqual(37.5, sensor.res)
+        self.assertEqual(rasterio.transform.from_origin(1000, 2000, 30 / 8 * 10, 40), sensor.meta["transform"])
+        self.assertEqual(80, len(sensor.dataframe))
+
+    def test_decimated_pixels(self):
+        sensor = GeneralSensor(self.image, decimation=2)
+        # nearest takes the pixel at the center of each 2x2 block
+        expected = self.stack[:, 1::2, 1::2].reshape((2, -1)).T
+        self.assertTrue(np.array_equal(expected, sensor.dataframe.to_numpy()))
+        windows = [dataframe for _, dataframe in sensor.iter_windows(window_size=(7, 4))]
+        self.assertTrue(np.array_equal(np.sort(expected, axis=0),
+                                       np.sort(pd.concat(windows).to_numpy(), axis=0)))
+
+    def test_decimation_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            GeneralSensor(self.image, decimation=0)
+
+
+class GeneralSensorCobertureTest(unittest.TestCase):
+    def setUp(self):
+        self.landsat8 = Landsat8(small_2018_dataset)
+        left, top, res = self.landsat8.bounds["left"], self.landsat8.bounds["top"], self.landsat8.res
+        # a polygon of 3x4 pixels and another one of 2x2 pixels
+        polygons = [box(left, top - 3 * res, left + 4 * res, top),
+                    box(left + 6 * res, top - 8 * res, left + 8 * res, top - 6 * res)]
+        self.cobertures = gpd.GeoDataFrame({"coberture": [3, 7]}, geometry=polygons, crs=self.landsat8.crs)
+        self.expected = features.rasterize(zip(self.cobertures.geometry, self.cobertures.coberture), fill=-9999,
+                                           out_shape=(9, 10), transform=self.landsat8.meta["transform"]).ravel()
+
+    def test_cobertures_are_burned_into_a_small_integer(self):
+        self.landsat8.coberture_to_pandas(self.cobertures)
+        cobertures = self.landsat8.dataframe["COBERTURE"]
+        self.assertEqual(np.int16, cobertures.dtype)
+        self.assertTrue(np.array_equal(self.expected, cobertures.to_numpy()))
+        self.assertEqual(16, len(self.landsat8.select_df_of_cobertures()))
+        self.landsat8.coberture_to_pandas(self.cobertures, fillna=0)
+        self.assertEqual(np.uint8, self.landsat8.dataframe["COBERTURE"].dtype)
+
+    def test_windows_burn_the_same_cobertures(self):
+        self.landsat8.coberture_to_pandas(self.cobertures, window_size=(4, 3))
+        self.assertTrue(np.array_equal(self.expected, self.landsat8.dataframe["COBERTURE"].to_numpy()))
+
+    def test_categorical(self):
+        self.cobertures["coberture"] = ["forest", "water"]
+        self.landsat8.coberture_to_pandas(self.cobertures, categorical=True)
+        cobertures = self.landsat8.dataframe["COBERTURE"]
+        self.assertIsInstance(cobertures.dtype, pd.CategoricalDtype)
+        self.assertEqual(12, (cobertures == "forest").sum())
+        self.assertEqual(4, (cobertures == "water").sum())
+        self.assertEqual(16, len(self.landsat8.select_df_of_cobertures()))
+
+    def test_valid_pixels_get_their_cobertures(self):
+        landsat8 = Landsat8(small_2018_dataset, valid_only=True)
+        landsat8.dataframe = landsat8.dataframe.iloc[::2]
+        landsat8.coberture_to_pandas(self.cobertures)
+        self.assertTrue(np.array_equal(self.expected[::2], landsat8.dataframe["COBERTURE"].to_numpy()))
+
+    def test_sparse_cobertures_keep_only_the_labelled_pixels(self):
+        self.landsat8.coberture_to_pandas(self.cobertures, sparse=True)
+        self.assertNotIn("COBERTURE", self.landsat8.dataframe.columns)
+        labelled = np.flatnonzero(self.expected != -9999)
+        self.assertTrue(np.array_equal(labelled, self.landsat8.cobertures.index.to_numpy()))
+        self.assertTrue(np.array_equal(self.expected[labelled], self.landsat8.cobertures.to_numpy()))
+        self.landsat8.coberture_to_pandas(self.cobertures, window_size=(4, 3), sparse=True)
+        self.assertTrue(np.array_equal(labelled, np.sort(self.landsat8.cobertures.index.to_numpy())))
+
+    def test_sparse_cobertures_select_the_same_rows(self):
+        self.landsat8.coberture_to_pandas(self.cobertures)
+        expected = self.landsat8.select_df_of_cobertures()
+        self.landsat8.dataframe = self.landsat8.dataframe.drop("COBERTURE", axis=1)
+        self.landsat8.coberture_to_pandas(self.cobertures, sparse=True)
+        pd.testing.assert_frame_equal(expected, self.landsat8.select_df_of_cobertures())
+
+    def test_sparse_categorical_cobertures_of_valid_pixels(self):
+        self.cobertures["coberture"] = ["forest", "water"]
+        landsat8 = Landsat8(small_2018_dataset, valid_only=True)
+        landsat8.dataframe = landsat8.dataframe.iloc[::2]
+        landsat8.coberture_to_pandas(self.cobertures, categorical=True, window_size=(4, 3), sparse=True)
+        selected = landsat8.select_df_of_cobertures()
+        self.assertIsInstance(selected["COBERTURE"].dtype, pd.CategoricalDtype)
+        labelled = np.flatnonzero(self.expected != -9999)
+        self.assertTrue(np.array_equal(labelled[labelled % 2 == 0], np.sort(selected.index.to_numpy())))
+
+    def test_labelled_pixels_are_read_without_loading_the_image(self):
+        self.landsat8.coberture_to_pandas(self.cobertures)
+        expected = self.landsat8.select_df_of_cobertures()
+        landsat8 = Landsat8(small_2018_dataset, lazy=True)
+        labelled = landsat8.labelled_to_pandas(self.cobertures, window_size=(4, 3))
+        self.assertFalse(landsat8.is_loaded)
+        pd.testing.assert_frame_equal(expected, labelled.sort_index(), check_index_type=False)
+
+    def test_cobertures_in_another_crs_are_reprojected(self):
+        self.landsat8.coberture_to_pandas(self.cobertures.to_crs("EPSG:4326"))
+        self.assertTrue(np.array_equal(self.expected, self.landsat8.dataframe["COBERTURE"].to_numpy()))
+
+    def test_only_the_cobertures_in_the_image_are_burned(self):
+        left, top, res = self.landsat8.bounds["left"], self.landsat8.bounds["top"], self.landsat8.res
+        outside = box(left - 50 * res, top, left - 40 * res, top + 10 * res)
+        # crosses the left and top borders of the image
+        crossing = box(left - 5 * res, top - res, left + res, top + 5 * res)
+        cobertures = pd.concat([self.cobertures, gpd.GeoDataFrame({"coberture": [9, 3]},
+                                                                  geometry=[outside, crossing],
+                                                                  crs=self.landsat8.crs)])
+        positions, geometries = self.landsat8._geometries_in_image(cobertures)
+        self.assertEqual([0, 1, 3], positions.tolist())
+        self.assertTrue(box(left, top - res, left + res, top).equals(geometries[2]))
+        self.landsat8.coberture_to_pandas(cobertures)
+        self.assertTrue(np.array_equal(self.expected, self.landsat8.dataframe["COBERTURE"].to_numpy()))
+
+    def test_polygons_that_only_touch_the_border_are_not_burned(self):
+        bounds = self.landsat8.bounds
+        touching = box(bounds["left"] - 3 * self.landsat8.res, bounds["bottom"], bounds["left"], bounds["top"])
+        cobertures = gpd.GeoDataFrame({"coberture": [5]}, geometry=[touching], crs=self.landsat8.crs)
+        self.landsat8.coberture_to_pandas(cobertures)
+        self.assertTrue((self.landsat8.dataframe["COBERTURE"] == -9999).all())
+        self.assertEqual(0, len(self.landsat8._geometries_in_image(cobertures)[0]))
+
+    def test_sparse_cobertures_of_a_lazy_sensor(self):
+        self.landsat8.coberture_to_pandas(self.cobertures)
+        expected = self.landsat8.select_df_of_cobertures().drop("COBERTURE", axis=1)
+        landsat8 = Landsat8(small_2018_dataset, lazy=True)
+        landsat8.coberture_to_pandas(self.cobertures, sparse=True)
+        self.assertFalse(landsat8.is_loaded)
+        self.assertEqual(16, len(landsat8.select_df_of_cobertures()))
+        landsat8.release()
+        selected = landsat8.select_df_of_cobertures()
+        pd.testing.assert_frame_equal(expected, selected.drop("COBERTURE", axis=1))
+
+    def test_float_cobertures_without_decimals(self):
+        self.cobertures["coberture"] = [3., 7.]
+        self.landsat8.coberture_to_pandas(self.cobertures)
+        self.assertTrue(np.array_equal(self.expected, self.landsat8.dataframe["COBERTURE"].to_numpy()))
+        # a polygon without coberture is not labelled
+        self.cobertures["coberture"] = [3., np.nan]
+        self.landsat8.coberture_to_pandas(self.cobertures)
+        self.assertEqual(12, len(self.landsat8.select_df_of_cobertures()))
+        self.cobertures["coberture"] = [3.5, 7.]
+        with self.assertRaises(ValueError):
+            self.landsat8.coberture_to_pandas(self.cobertures)
+
+    def test_categorical_cobertures_are_written_as_their_codes(self):
+        self.cobertures["coberture"] = ["forest", "water"]
+        self.landsat8.coberture_to_pandas(self.cobertures, categorical=True)
+        with tempfile.TemporaryDirectory() as directory:
+            name = os.path.join(directory, "bands.tif")
+            self.landsat8.dataframe_to_raster(name)
+            with rasterio.open(name) as dataset:
+                self.assertEqual(("float32",) * 9, dataset.dtypes)
+                written = dataset.read(9).ravel()
+        codes = self.landsat8.dataframe["COBERTURE"].cat.codes.to_numpy()
+        self.assertTrue(np.array_equal(codes, written))
+        self.assertEqual({-1, 0, 1}, set(written.tolist()))
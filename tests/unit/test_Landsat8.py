@@ -1,5 +1,9 @@
 import unittest
+import numpy as np
+import rasterio
 from feature_raster.Sensors.Landsat import Landsat8
+from feature_raster.exceptions import InvalidBand
+from feature_raster.project_enums import LandsatEnums
 from rasterio.crs import CRS
 from tests.paths import small_2018_dataset
 
@@ -21,8 +25,22 @@ class Landsat8Test(unittest.TestCase):
         self.assertEqual(expected_general["crs"], self.landsat8.meta["crs"])
 
     def test_correct_parsing_from_raster_to_pandas(self):
-        # TODO dont forget to create this test
-        pass
+        with rasterio.open(small_2018_dataset) as dataset:
+            nir = dataset.read(5)
+        self.assertEqual(np.dtype('uint16'), self.landsat8.dataframe[LandsatEnums.nir.value].dtype)
+        self.assertEqual(90, len(self.landsat8.dataframe))
+        self.assertTrue(np.array_equal(nir.flatten(), self.landsat8.dataframe[LandsatEnums.nir.value].to_numpy()))
+
+    def test_only_the_selected_bands_are_read(self):
+        landsat8 = Landsat8(small_2018_dataset, bands=[LandsatEnums.swir1, LandsatEnums.red.value])
+        self.assertEqual([LandsatEnums.red.value, LandsatEnums.swir1.value], landsat8.dataframe.columns.tolist())
+        self.assertEqual([4, 6], landsat8.band_indexes)
+        for column in landsat8.dataframe.columns:
+            self.assertTrue(np.array_equal(self.landsat8.dataframe[column], landsat8.dataframe[column]))
+
+    def test_unknown_band(self):
+        with self.assertRaises(InvalidBand):
+            Landsat8(small_2018_dataset, bands=["THERMAL"])
 
 
 
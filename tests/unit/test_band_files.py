@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import rasterio
+from feature_raster.Sensors import GeneralSensor
+from feature_raster.Sensors.Landsat import Landsat8
+from feature_raster.exceptions import InvalidBand, InvalidImage
+from feature_raster.project_enums import LandsatEnums
+from tests.paths import small_2018_dataset
+
+try:
+    import pyarrow
+    pyarrow_installed = True
+except ImportError:
+    pyarrow_installed = False
+
+
+class BandFilesTest(unittest.TestCase):
+    def setUp(self):
+        self.landsat8 = Landsat8(small_2018_dataset)
+        self.directory = tempfile.TemporaryDirectory()
+        self.files = {}
+        # a product with a file per band like the ones of USGS
+        suffixes = ["B1", "B2", "B3", "B4", "B5", "B6", "B7", "BQA"]
+        with rasterio.open(small_2018_dataset) as dataset:
+            profile = dict(dataset.profile, count=1)
+            for band, suffix, index in zip(Landsat8.band_names, suffixes, dataset.indexes):
+                self.files[band] = os.path.join(self.directory.name, f"LC08_L1TP_007057_20180101_{suffix}.TIF")
+                with rasterio.open(self.files[band], "w", **profile) as band_dataset:
+                    band_dataset.write(dataset.read(index), 1)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_product_directory(self):
+        landsat8 = Landsat8(self.directory.name)
+        self.assertTrue(self.landsat8.dataframe.equals(landsat8.dataframe))
+        self.assertEqual(self.landsat8.meta["transform"], landsat8.meta["transform"])
+        self.assertEqual(self.landsat8.crs, landsat8.crs)
+
+    def test_dict_of_some_bands(self):
+        files = {LandsatEnums.nir: self.files["NIR"], "RED": self.files["RED"]}
+        landsat8 = Landsat8(files, n_threads=2)
+        self.assertEqual(["RED", "NIR"], landsat8.dataframe.columns.tolist())
+        self.assertTrue(self.landsat8.dataframe[["RED", "NIR"]].equals(landsat8.dataframe))
+        windows = [dataframe for _, dataframe in landsat8.iter_windows(window_size=4)]
+        self.assertEqual(90, sum(len(dataframe) for dataframe in windows))
+
+    @unittest.skipUnless(pyarrow_installed, "pyarrow is not installed")
+    def test_dict_of_bands_to_parquet(self):
+        landsat8 = Landsat8({LandsatEnums.nir: self.files["NIR"], LandsatEnums.red: self.files["RED"]})
+        self.assertEqual({"RED": self.files["RED"], "NIR": self.files["NIR"]}, landsat8.img_path)
+        file_path = os.path.join(self.directory.name, "bands.parquet")
+        landsat8.to_parquet(file_path)
+        loaded = Landsat8.read_parquet(file_path)
+        self.assertEqual(landsat8.img_path, loaded.img_path)
+        self.assertTrue(landsat8.dataframe.equals(loaded.dataframe))
+
+    def test_general_sensor_names_the_bands_by_the_keys(self):
+        sensor = GeneralSensor({"A": self.files["RED"], "B": self.files["GREEN"]})
+        self.assertEqual(["A", "B"], sensor.dataframe.columns.tolist())
+        self.assertTrue(np.array_equal(self.landsat8.dataframe["GREEN"], sensor.dataframe["B"]))
+
+    def test_unknown_band(self):
+        with self.assertRaises(InvalidBand):
+            Landsat8({"THERMAL": self.files["RED"]})
+
+    def test_files_must_share_the_grid(self):
+        other = os.path.join(self.directory.name, "other.tif")
+        with rasterio.open(small_2018_dataset) as dataset:
+            profile = dict(dataset.profile, count=1, width=5)
+            with rasterio.open(other, "w", **profile) as band_dataset:
+                band_dataset.write(dataset.read(1, window=((0, 9), (0, 5))), 1)
+        with self.assertRaises(InvalidImage):
+            Landsat8({"RED": self.files["RED"], "NIR": other})
+
+    def test_missing_file(self):
+        with self.assertRaises(ValueError):
+            Landsat8({"RED": os.path.join(self.directory.name, "missing.TIF")})
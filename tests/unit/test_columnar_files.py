@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from feature_raster.Sensors.Landsat import Landsat8
+from feature_raster.Transformers.Landsat import Landsat8Transformer
+from feature_raster.project_enums import LandsatEnums
+from tests.paths import small_2018_dataset
+
+try:
+    import pyarrow
+    pyarrow_installed = True
+except ImportError:
+    pyarrow_installed = False
+
+
+@unittest.skipUnless(pyarrow_installed, "pyarrow is not installed")
+class ColumnarFilesTest(unittest.TestCase):
+    def setUp(self):
+        self.landsat8 = Landsat8(small_2018_dataset)
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def check_round_trip(self, save, read):
+        features = Landsat8Transformer().transform(self.landsat8)
+        file_path = os.path.join(self.directory.name, "features")
+        getattr(self.landsat8, save)(file_path, features)
+        loaded = getattr(Landsat8, read)(file_path)
+        self.assertIsInstance(loaded, Landsat8)
+        self.assertTrue(features.equals(loaded.dataframe))
+        for attribute in ["bounds", "crs", "res", "dtypes", "indexes", "bands", "band_indexes"]:
+            self.assertEqual(getattr(self.landsat8, attribute), getattr(loaded, attribute), attribute)
+        self.assertEqual(self.landsat8.meta, loaded.meta)
+        columns = [LandsatEnums.ndvi.value, LandsatEnums.red.value]
+        projected = getattr(Landsat8, read)(file_path, columns=columns)
+        self.assertEqual(columns, projected.dataframe.columns.tolist())
+        self.assertTrue(features[columns].equals(projected.dataframe))
+
+    def test_parquet(self):
+        self.check_round_trip("to_parquet", "read_parquet")
+
+    def test_feather(self):
+        self.check_round_trip("to_feather", "read_feather")
+
+    def test_the_positions_of_the_valid_pixels_are_kept(self):
+        landsat8 = Landsat8(small_2018_dataset, valid_only=True)
+        landsat8.dataframe = landsat8.dataframe.iloc[10:20]
+        file_path = os.path.join(self.directory.name, "bands.parquet")
+        landsat8.to_parquet(file_path)
+        loaded = Landsat8.read_parquet(file_path, columns=[LandsatEnums.nir.value])
+        self.assertTrue(np.array_equal(np.arange(10, 20), loaded.dataframe.index.to_numpy()))
+        self.assertTrue(loaded.valid_only)
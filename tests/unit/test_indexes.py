@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+from feature_raster.Transformers import release_terms, shared_subexpressions, term_uses
+from feature_raster.Transformers.Landsat import ndvic, gossan, ctvi, laterite, tm5_tm7, sci, ndbi
+
+try:
+    import dask.array as da
+    dask_installed = True
+except ImportError:
+    dask_installed = False
+
+
+class IndexesArrayLikeTest(unittest.TestCase):
+    def setUp(self):
+        self.red = np.array([10., 0., 30., 40.])
+        self.swir1 = np.array([20., 10., 0., 80.])
+        self.expected = np.array([2., 0., 0., 2.])
+
+    def test_numpy_arrays_return_numpy_arrays(self):
+        index = gossan(self.red, self.swir1)
+        self.assertIsInstance(index, np.ndarray)
+        self.assertTrue(np.array_equal(self.expected, index))
+
+    def test_series_return_series_with_the_same_index(self):
+        red = pd.Series(self.red, index=[4, 5, 6, 7])
+        index = gossan(red, pd.Series(self.swir1, index=[4, 5, 6, 7]))
+        self.assertIsInstance(index, pd.Series)
+        self.assertEqual([4, 5, 6, 7], index.index.tolist())
+        self.assertTrue(np.array_equal(self.expected, index.to_numpy()))
+
+    def test_memmaps(self):
+        with tempfile.TemporaryDirectory() as directory:
+            red = np.memmap(os.path.join(directory, "red"), dtype=np.float64, mode="w+", shape=(4,))
+            red[:] = self.red
+            self.assertTrue(np.array_equal(self.expected, gossan(red, self.swir1)))
+            del red
+
+    @unittest.skipUnless(dask_installed, "dask is not installed")
+    def test_dask_arrays_stay_lazy(self):
+        bands = [da.from_array(band, chunks=2) for band in [self.red, self.red, self.swir1, self.swir1]]
+        index = ndvic(*bands)
+        self.assertIsInstance(index, da.Array)
+        self.assertTrue(np.allclose(ndvic(self.red, self.red, self.swir1, self.swir1), index.compute()))
+
+    def test_lists_are_not_arrays(self):
+        with self.assertRaises(TypeError):
+            ctvi([0.1, 0.2])
+
+
+class SharedSubexpressionsTest(unittest.TestCase):
+    def setUp(self):
+        self.nir = np.array([10., 0., 30., 40.])
+        self.swir1 = np.array([20., 0., 10., 80.])
+
+    def test_shared_terms_are_computed_once(self):
+        with shared_subexpressions():
+            self.assertIs(laterite(self.swir1, self.nir), tm5_tm7(self.swir1, self.nir))
+            self.assertIs(sci(self.nir, self.swir1), ndbi(self.nir, self.swir1))
+            # the same memory seen by another array is the same term
+            self.assertIs(sci(self.nir, self.swir1), ndbi(self.nir[:], self.swir1[:]))
+
+    def test_terms_are_not_shared_outside_the_block(self):
+        with shared_subexpressions():
+            shared = laterite(self.swir1, self.nir)
+        self.assertIsNot(shared, tm5_tm7(self.swir1, self.nir))
+        self.assertTrue(np.array_equal(shared, tm5_tm7(self.swir1, self.nir)))
+
+    def test_terms_are_freed_after_their_last_consumer(self):
+        names = {"NIR": self.nir, "SWIR1": self.swir1}
+        pixel = {name: np.zeros(1) for name in names}
+        consumers = [lambda: laterite(pixel["SWIR1"], pixel["NIR"]), lambda: tm5_tm7(pixel["SWIR1"], pixel["NIR"]),
+                     lambda: sci(pixel["NIR"], pixel["SWIR1"])]
+        uses = term_uses(consumers, pixel)
+        with shared_subexpressions(names, uses):
+            shared = laterite(self.swir1, self.nir)
+            release_terms()
+            self.assertIs(shared, tm5_tm7(self.swir1, self.nir))
+            release_terms()
+            # tm5_tm7 was the last consumer of swir1 / nir
+            self.assertIsNot(shared, laterite(self.swir1, self.nir))
+
+    def test_different_arrays_are_not_shared(self):
+        with shared_subexpressions():
+            self.assertFalse(np.array_equal(sci(self.nir, self.swir1), sci(self.swir1, self.nir)))
+            self.assertFalse(np.array_equal(laterite(self.swir1, self.nir), laterite(self.swir1, self.nir * 2)))
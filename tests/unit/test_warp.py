@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+import rasterio
+from rasterio.crs import CRS
+from rasterio.transform import from_origin
+from feature_raster.Sensors import GeneralSensor
+from feature_raster.Sensors.Landsat import Landsat8
+from tests.paths import small_2018_dataset
+
+
+class WarpTest(unittest.TestCase):
+    def setUp(self):
+        self.landsat8 = Landsat8(small_2018_dataset)
+
+    def test_the_grid_of_another_crs(self):
+        warped = Landsat8(small_2018_dataset, warp={"crs": "EPSG:4326"})
+        self.assertEqual(CRS.from_epsg(4326), warped.crs)
+        self.assertEqual(CRS.from_epsg(4326), warped.meta["crs"])
+        self.assertEqual(warped.meta["width"] * warped.meta["height"], len(warped.dataframe))
+        self.assertLess(warped.bounds["right"], 0)
+        windows = [dataframe for _, dataframe in warped.iter_windows(window_size=4)]
+        self.assertEqual(len(warped.dataframe), sum(len(dataframe) for dataframe in windows))
+
+    def test_the_same_grid_reads_the_same_pixels(self):
+        meta = self.landsat8.meta
+        warp = {"transform": meta["transform"], "width": meta["width"], "height": meta["height"]}
+        warped = Landsat8(small_2018_dataset, warp=warp, n_threads=2)
+        self.assertTrue(self.landsat8.dataframe.equals(warped.dataframe))
+
+    def test_resolution(self):
+        warped = Landsat8(small_2018_dataset, warp={"resolution": self.landsat8.res * 3}, resampling="average")
+        self.assertEqual(self.landsat8.res * 3, warped.res)
+        self.assertEqual((3, 4), (warped.meta["height"], warped.meta["width"]))
+        red = self.landsat8.dataframe["RED"].to_numpy().reshape((9, 10))
+        # the first pixel covers the first 3x3 pixels of the image
+        self.assertLessEqual(abs(red[:3, :3].mean() - warped.dataframe["RED"].iloc[0]), 1)
+
+    def test_written_rasters_are_in_the_grid(self):
+        with tempfile.TemporaryDirectory() as directory:
+            name = os.path.join(directory, "bands.tif")
+            warped = Landsat8(small_2018_dataset, warp={"crs": "EPSG:4326"})
+            warped.dataframe_to_raster(name)
+            with rasterio.open(name) as dataset:
+                self.assertEqual(CRS.from_epsg(4326), dataset.crs)
+                self.assertEqual(warped.meta["transform"], dataset.transform)
+
+    def test_unknown_options(self):
+        with self.assertRaises(ValueError):
+            GeneralSensor(small_2018_dataset, warp={"epsg": 4326})
+        with self.assertRaises(ValueError):
+            GeneralSensor(small_2018_dataset, warp={"transform": from_origin(0, 0, 1, 1)})